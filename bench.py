@@ -0,0 +1,160 @@
+
+__author__      = "Felix Friesenbichler"
+__email__       = "1127@htl.rennweg.at"
+__license__     = "GPLv2"
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import collatz
+import palindrom
+import rekursiv
+
+
+def _case_m(scale: float) -> Callable[[], object]:
+    n = max(1, int(200 * scale))
+
+    def run():
+        rekursiv.M.cache_clear()
+        return [rekursiv.M(i) for i in range(n)]
+    return run
+
+
+def _case_collatz(scale: float) -> Callable[[], object]:
+    n = max(1, int(10 ** 5 * scale))
+    return lambda: collatz.longest_collatz_sequence(n)
+
+
+def _case_palindrome_product(scale: float) -> Callable[[], object]:
+    x = max(1, int(10 ** 6 * scale))
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return palindrom.palindrome_product(x)
+    return run
+
+
+def _case_dec_hex(scale: float) -> Callable[[], object]:
+    x = max(1, int(10 ** 8 * scale))
+    return lambda: palindrom.get_dec_hex_palindrome(x)
+
+
+def _case_to_base(scale: float) -> Callable[[], object]:
+    number = random.Random(0).getrandbits(max(1, int(50000 * scale)))
+    return lambda: palindrom.to_base(number, 7)
+
+
+CASES = {
+    "rekursiv.M": _case_m,
+    "collatz.longest_collatz_sequence": _case_collatz,
+    "palindrom.palindrome_product": _case_palindrome_product,
+    "palindrom.get_dec_hex_palindrome": _case_dec_hex,
+    "palindrom.to_base": _case_to_base,
+}
+
+
+def summarize(times: List[float]) -> Dict[str, float]:
+    """
+    Computes median, quartiles and IQR of the measured times and counts the
+    outliers outside of the Tukey fences (1.5 * IQR beyond the quartiles).
+
+    >>> s = summarize([1.0, 1.1, 1.0, 0.9, 1.0, 5.0])
+    >>> s["median"], s["outliers"]
+    (1.0, 1)
+    """
+    ordered = sorted(times)
+    if len(ordered) > 1:
+        q1, _, q3 = statistics.quantiles(ordered, n=4)
+    else:
+        q1 = q3 = ordered[0]
+    iqr = q3 - q1
+    low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    return {
+        "median": statistics.median(ordered),
+        "q1": q1,
+        "q3": q3,
+        "iqr": iqr,
+        "min": ordered[0],
+        "max": ordered[-1],
+        "runs": len(ordered),
+        "outliers": sum(1 for t in ordered if t < low or t > high),
+    }
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int) -> Dict[str, float]:
+    """Runs func warmup times without measuring, then repeat times measured."""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        t0 = perf_counter()
+        func()
+        times.append(perf_counter() - t0)
+    return summarize(times)
+
+
+def compare(baseline: Dict, results: Dict, threshold: float) -> List[str]:
+    """
+    Returns the names of all cases whose median is more than threshold
+    (relative) slower than in the baseline.
+
+    >>> base = {"cases": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    >>> new = {"cases": {"a": {"median": 1.1}, "b": {"median": 1.5}, "c": {"median": 9}}}
+    >>> compare(base, new, 0.25)
+    ['b']
+    """
+    regressions = []
+    for name, stats in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if old and stats["median"] > old["median"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the numeric modules")
+    parser.add_argument("-r", "--repeat", type=int, default=15, help="Measured runs per case")
+    parser.add_argument("-w", "--warmup", type=int, default=2, help="Unmeasured runs per case")
+    parser.add_argument("-s", "--scale", type=float, default=1.0, help="Factor for the input sizes")
+    parser.add_argument("-k", "--filter", default="", help="Only run cases containing this text")
+    parser.add_argument("-o", "--output", help="Write the results as JSON baseline")
+    parser.add_argument("-b", "--baseline", help="JSON baseline to compare with")
+    parser.add_argument("-t", "--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown of the median (default 0.25)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = {"python": platform.python_version(), "scale": args.scale, "cases": {}}
+    for name, make_case in CASES.items():
+        if args.filter not in name:
+            continue
+        stats = measure(make_case(args.scale), args.repeat, args.warmup)
+        results["cases"][name] = stats
+        print(f"{name:<36} median {stats['median'] * 1000:10.3f} ms  "
+              f"IQR {stats['iqr'] * 1000:8.3f} ms  outliers {stats['outliers']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print("Warning: baseline was measured with a different scale", file=sys.stderr)
+        regressions = compare(baseline, results, args.threshold)
+        for name in regressions:
+            print(f"Regression: {name} is more than {args.threshold:.0%} slower than the baseline",
+                  file=sys.stderr)
+        sys.exit(1 if regressions else 0)
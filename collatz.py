@@ -1,9 +1,18 @@
-from typing import List, Tuple
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from trampoline import trampoline
 
 __author__ = "Felix Friesenbichler"
 __email__ = "1127@htl.rennweg.at"
 __license__ = "GPLv2"
 
+try:
+    import fcntl
+except ImportError:  # Windows: no locking between writers
+    fcntl = None
+
 def collatz(n: int) -> int:
     """
     Computes the next number in the collatz sequence.
@@ -32,23 +41,100 @@ def collatz_sequence(number:int) -> List[int]:
     [19, 58, 29, 88, 44, 22, 11, 34, 17, 52, 26, 13, 40, 20, 10, 5, 16, 8, 4, 2, 1]
     >>> collatz_sequence(20)
     [20, 10, 5, 16, 8, 4, 2, 1]
+    >>> len(collatz_sequence(2 ** 5000))
+    5001
+    >>> collatz_sequence(0)
+    Traceback (most recent call last):
+        ...
+    ValueError: The collatz sequence is only defined for numbers >= 1
+    """
+    if number < 1:
+        raise ValueError("The collatz sequence is only defined for numbers >= 1")
+    sequence = [0] * _collatz_sequence_length(number)
+    for i, value in enumerate(collatz_generator(number)):
+        sequence[i] = value
+    return sequence
+
+
+@trampoline(maxsize=1 << 10)
+def _collatz_sequence_length(number: int) -> int:
+    """
+    Recursive definition of the length of the collatz sequence, run on an
+    explicit stack. Only the lengths are memoized (not the subsequences),
+    so the memo stays small; the sequence itself is built iteratively.
+
+    >>> _collatz_sequence_length(19)
+    21
     """
     if number == 1:
-        return [1]
+        return 1
 
     if number % 2 == 0:
         next_number = number // 2
     else:
         next_number = 3 * number + 1
 
-    return [number] + collatz_sequence(next_number)
+    rest = yield _collatz_sequence_length.recurse(next_number)
+    return rest + 1
+
+
+def collatz_generator(number: int) -> Iterator[int]:
+    """
+    Lazily generates the collatz sequence beginning with number (iterative,
+    so long trajectories do not hit the recursion limit).
 
+    :param number: The beginning number for the sequence.
+    :return: An iterator over the sequence.
 
-def longest_collatz_sequence(n: int) -> Tuple[int, int]:
+    >>> list(collatz_generator(20))
+    [20, 10, 5, 16, 8, 4, 2, 1]
+    """
+    yield number
+    while number != 1:
+        number = collatz(number)
+        yield number
+
+
+def collatz_lengths(limit: int) -> array:
+    """
+    Computes the lengths of the collatz sequences (as len(collatz_sequence(i)))
+    for all starting values i < limit and stores them in a compact
+    array('H'). The values are processed in ascending order, so every
+    trajectory is only followed until it drops below its starting value,
+    whose length is already cached. Even values are looked up directly.
+
+    :param limit: The cap (exclusive) for the starting values.
+    :return: An array with the lengths; index 0 is unused and stays 0.
+
+    >>> list(collatz_lengths(10))
+    [0, 1, 2, 8, 3, 6, 9, 17, 4, 20]
+    """
+    cache = array("H", bytes(2 * max(limit, 2)))
+    cache[1] = 1
+    for i in range(2, limit):
+        if not i & 1:
+            cache[i] = cache[i >> 1] + 1
+            continue
+        n = i
+        steps = 0
+        while n >= i:
+            if n & 1:
+                # 3n + 1 is always even, so do both steps at once.
+                n = (3 * n + 1) >> 1
+                steps += 2
+            else:
+                n >>= 1
+                steps += 1
+        cache[i] = cache[n] + steps
+    return cache[:max(limit, 0)]
+
+
+def longest_collatz_sequence(n: int, store: Optional["CollatzStore"] = None) -> Tuple[int, int]:
     """
     Finds the longest collatz sequence starting with n
 
     :param n: The cap for the starting value of the collatz sequence
+    :param store: Optional CollatzStore which is consulted (and extended) first
     :return: Starting value and length of the longest collatz sequence beginning with n
     >>> longest_collatz_sequence(100)
     (97, 119)
@@ -56,13 +142,331 @@ def longest_collatz_sequence(n: int) -> Tuple[int, int]:
     (18, 21)
     """
 
-    max_length = 0
-    start_number = 0
+    if n < 1:
+        return (0, 0)
+    if store is not None:
+        return store.longest(n)
+
+    lengths = collatz_lengths(n + 1)
+    start_number = max(range(1, n + 1), key=lengths.__getitem__)
+    return (start_number, lengths[start_number])
+
+
+_SWEEP_CACHE = {}
+
+
+def _sweep_cache(cache_size: int):
+    """Returns (and memoizes per process) the lengths below cache_size as NumPy array."""
+    import numpy as np
+
+    if cache_size not in _SWEEP_CACHE:
+        _SWEEP_CACHE[cache_size] = np.frombuffer(collatz_lengths(cache_size), dtype=np.uint16).astype(np.int64)
+    return _SWEEP_CACHE[cache_size]
+
+
+def _collatz_length_from(n: int, cache) -> int:
+    """Scalar fallback with Python ints for trajectories that leave uint64."""
+    steps = 0
+    while n >= len(cache):
+        n = 3 * n + 1 if n & 1 else n >> 1
+        steps += 1
+    return steps + int(cache[n])
+
+
+def _chunk_lengths(a: int, b: int, cache):
+    """
+    Computes the lengths of the collatz sequences for starting values in
+    [a, b). All values of the chunk are advanced at once as a NumPy vector
+    (odd values do 3n+1 and the following halving in one step) until they
+    drop below len(cache), where the remaining length is looked up.
+
+    :param cache: Array with the lengths of all values below len(cache) (at least 2)
+    :return: NumPy array with the lengths
+
+    >>> _chunk_lengths(5, 10, _sweep_cache(2)).tolist()
+    [6, 9, 17, 4, 20]
+    """
+    import numpy as np
+
+    cache_size = len(cache)
+    if cache_size < 2:
+        raise ValueError("The cache must contain at least the lengths of 0 and 1")
+    safe = np.uint64((2 ** 64 - 2) // 3)
+    lengths = np.zeros(b - a, dtype=np.int64)
+    values = np.arange(a, b, dtype=np.uint64)
+    index = np.arange(b - a)
+    steps = np.zeros(b - a, dtype=np.int64)
+
+    while values.size:
+        done = values < cache_size
+        if done.any():
+            lengths[index[done]] = steps[done] + cache[values[done].astype(np.int64)]
+            keep = ~done
+            values, index, steps = values[keep], index[keep], steps[keep]
+            if not values.size:
+                break
+        odd = (values & np.uint64(1)).astype(bool)
+        overflow = odd & (values > safe)
+        if overflow.any():
+            for i in np.flatnonzero(overflow):
+                lengths[index[i]] = steps[i] + _collatz_length_from(int(values[i]), cache)
+            keep = ~overflow
+            values, index, steps, odd = values[keep], index[keep], steps[keep], odd[keep]
+        values = np.where(odd, (values * np.uint64(3) + np.uint64(1)) >> np.uint64(1), values >> np.uint64(1))
+        steps += np.where(odd, 2, 1)
+
+    return lengths
+
+
+def _sweep_chunk(a: int, b: int, cache_size: int) -> Tuple[int, int]:
+    """
+    Computes the longest collatz sequence for starting values in [a, b)
+    (see _chunk_lengths).
+
+    >>> _sweep_chunk(1, 21, 8)
+    (18, 21)
+    """
+    import numpy as np
+
+    lengths = _chunk_lengths(a, b, _sweep_cache(cache_size))
+    best = int(np.argmax(lengths))
+    return (a + best, int(lengths[best]))
+
+
+def collatz_sweep(a: int, b: int, processes: Optional[int] = None, chunk_size: int = 1 << 20,
+                  cache_size: int = 1 << 20) -> Tuple[int, int]:
+    """
+    Finds the longest collatz sequence for starting values in [a, b) like
+    longest_collatz_sequence, but for huge ranges: the range is split into
+    chunks which are computed vectorized with NumPy (see _sweep_chunk) and
+    distributed across a process pool; the maxima of the chunks are merged
+    at the end. Requires NumPy.
+
+    :param a: First starting value (at least 1)
+    :param b: Cap (exclusive) for the starting values
+    :param processes: Number of worker processes (None or 1: no pool)
+    :param chunk_size: Number of starting values per chunk
+    :param cache_size: Lengths below this value are precomputed per process
+    :return: Starting value and length of the longest collatz sequence
+
+    >>> collatz_sweep(1, 101, chunk_size=30)
+    (97, 119)
+    >>> collatz_sweep(1, 10**4, processes=2, chunk_size=1000, cache_size=100)
+    (6171, 262)
+    >>> collatz_sweep(1, 10, cache_size=1)
+    Traceback (most recent call last):
+        ...
+    ValueError: cache_size must be at least 2
+    """
+    if a < 1 or b <= a:
+        raise ValueError("Range must be non-empty and start at 1 or above")
+    if cache_size < 2:
+        raise ValueError("cache_size must be at least 2")
+    chunks = [(lo, min(lo + chunk_size, b), cache_size) for lo in range(a, b, chunk_size)]
+    if processes is None or processes <= 1:
+        results = [_sweep_chunk(*chunk) for chunk in chunks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_sweep_chunk, *zip(*chunks)))
+    return max(results, key=lambda r: (r[1], -r[0]))
+
+
+class JumpTable:
+    """
+    Precomputed tables to apply k steps of the shortcut map
+    T(n) = n/2 (n even), (3n+1)/2 (n odd) at once. With n = h * 2**k + l:
+
+        T^k(n) = 3**odd[l] * h + rest[l]
+
+    which corresponds to k + odd[l] steps of collatz(). Lengths below 2**k
+    are looked up in small_lengths. The tables are cached on disk as .npz
+    files (NumPy is needed to build and load them).
+
+    >>> table = JumpTable.build(4)
+    >>> [table.length(n) for n in (1, 16, 27, 97)]
+    [1, 5, 112, 119]
+    """
+
+    def __init__(self, k: int, odd: List[int], rest: List[int], small_lengths: List[int]):
+        self.k = k
+        self.odd = odd
+        self.rest = rest
+        self.small_lengths = small_lengths
+        self._pow3 = [3 ** c for c in range(k + 1)]
+
+    @classmethod
+    def build(cls, k: int) -> "JumpTable":
+        """Computes the tables for all 2**k remainders vectorized with NumPy."""
+        return cls(k, *(a.tolist() for a in cls._build_arrays(k)))
+
+    @staticmethod
+    def _build_arrays(k: int):
+        import numpy as np
+
+        rest = np.arange(1 << k, dtype=np.int64)
+        odd = np.zeros(1 << k, dtype=np.uint8)
+        for _ in range(k):
+            is_odd = rest & 1
+            rest = np.where(is_odd, (3 * rest + 1) >> 1, rest >> 1)
+            odd += is_odd.astype(np.uint8)
+        small = np.frombuffer(collatz_lengths(1 << k), dtype=np.uint16)
+        return odd, rest, small
+
+    @classmethod
+    def load(cls, k: int = 16, cache_dir: Optional[Path] = None) -> "JumpTable":
+        """
+        Loads the tables for k from cache_dir (default ~/.cache/collatz) or
+        builds and stores them there if they do not exist yet.
+        """
+        import numpy as np
+
+        cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".cache" / "collatz"
+        path = cache_dir / f"jump_{k}.npz"
+        if path.exists():
+            with np.load(path) as data:
+                arrays = data["odd"], data["rest"], data["small"]
+        else:
+            arrays = cls._build_arrays(k)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp.npz")
+            np.savez(tmp, odd=arrays[0], rest=arrays[1], small=arrays[2])
+            tmp.replace(path)
+        return cls(k, *(a.tolist() for a in arrays))
+
+    def length(self, number: int) -> int:
+        """
+        Computes len(collatz_sequence(number)) with k-step jumps. A number of
+        at least 2**k cannot reach 1 before the end of a jump, so the jump
+        never skips over the end of the sequence.
+
+        >>> JumpTable.build(3).length(837799)
+        525
+        """
+        if number < 1:
+            raise ValueError("number must be positive")
+        k, mask = self.k, (1 << self.k) - 1
+        odd, rest, pow3 = self.odd, self.rest, self._pow3
+        steps = 0
+        while number > mask:
+            low = number & mask
+            c = odd[low]
+            number = pow3[c] * (number >> k) + rest[low]
+            steps += k + c
+        return steps + self.small_lengths[number]
+
+
+def collatz_length(number: int, jump_table: Optional[JumpTable] = None,
+                   store: Optional["CollatzStore"] = None) -> int:
+    """
+    Computes len(collatz_sequence(number)) iteratively, or with the given
+    JumpTable as backend. If a CollatzStore is given and already contains
+    number, the length is looked up there.
+
+    >>> collatz_length(97), collatz_length(97, JumpTable.build(5))
+    (119, 119)
+    """
+    if store is not None and number < len(store):
+        return store.length(number)
+    if jump_table is not None:
+        return jump_table.length(number)
+    length = 1
+    while number != 1:
+        number = collatz(number)
+        length += 1
+    return length
+
+
+class CollatzStore:
+    """
+    Persistent store of collatz sequence lengths: a raw file of
+    little-endian uint16 values indexed by n, read through numpy.memmap.
+    The file is only ever appended to, so several processes can read it
+    concurrently while one of them extends it (writers are serialized
+    with flock). New ranges are computed chunk-wise with _chunk_lengths,
+    looking up everything below the current end of the file.
+
+    >>> import tempfile
+    >>> store = CollatzStore(Path(tempfile.mkdtemp()) / "collatz.u16")
+    >>> store.longest(100)
+    (97, 119)
+    >>> len(store), store.length(27)
+    (101, 112)
+    """
+
+    DTYPE = "<u2"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._view = None
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            with self._locked() as f:
+                if f.tell() == 0:
+                    # n = 0 is unused, n = 1 has length 1.
+                    f.write(bytes([0, 0, 1, 0]))
+
+    def _locked(self):
+        """
+        Opens the file for appending and holds an exclusive lock while open.
+        The position is the end of the file after the lock was acquired.
+        """
+        f = open(self.path, "ab")
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0, 2)
+        return f
+
+    def __len__(self) -> int:
+        """Number of stored values (all n below this are available)."""
+        return self.path.stat().st_size // 2
+
+    def _array(self, limit: int):
+        """Returns a read-only memmap of at least limit values, extending if needed."""
+        import numpy as np
+
+        if limit > len(self):
+            self.extend(limit)
+        if self._view is None or len(self._view) < limit:
+            self._view = np.memmap(self.path, dtype=self.DTYPE, mode="r", shape=(len(self),))
+        return self._view
+
+    def extend(self, limit: int, chunk_size: int = 1 << 22) -> None:
+        """
+        Extends the store until it contains all values below limit. Chunks
+        grow with the store, so lookups hit early even for a fresh file.
+        """
+        import numpy as np
+
+        with self._locked() as f:
+            current = f.tell() // 2
+            while current < limit:
+                end = min(limit, current + min(chunk_size, current))
+                cache = np.memmap(self.path, dtype=self.DTYPE, mode="r", shape=(current,))
+                lengths = _chunk_lengths(current, end, cache)
+                del cache
+                f.write(lengths.astype(self.DTYPE).tobytes())
+                f.flush()
+                current = end
+
+    def length(self, number: int) -> int:
+        """Returns len(collatz_sequence(number)), extending the store if needed."""
+        if number < 1:
+            raise ValueError("number must be positive")
+        return int(self._array(number + 1)[number])
+
+    def longest(self, n: int) -> Tuple[int, int]:
+        """Returns starting value and length of the longest sequence for 1 <= i <= n."""
+        import numpy as np
 
-    for i in range(1, n+1):
-        length = len(collatz_sequence(i))
-        if length > max_length:
-            max_length = length
-            start_number = i
+        if n < 1:
+            return (0, 0)
+        view = self._array(n + 1)
+        best, best_length = 0, -1
+        for start in range(1, n + 1, 1 << 22):
+            block = view[start:min(start + (1 << 22), n + 1)]
+            i = int(np.argmax(block))
+            if block[i] > best_length:
+                best, best_length = start + i, int(block[i])
+        return (best, best_length)
 
-    return (start_number, max_length)
@@ -2,18 +2,68 @@ __author__ = "Felix Friesenbichler"
 __license__ = "GPLv2"
 __email__ = "1127@htl.rennweg.at"
 
+import sys
 from math import gcd
 
+_HASH_MODULUS = sys.hash_info.modulus
+_HASH_INF = sys.hash_info.inf
+
+
+def _tree_sum(paare):
+    """
+    Summiert ungekürzte Paare (zaehler, nenner) paarweise in einem Baum,
+    damit die Zwischenergebnisse ähnlich groß bleiben. Es wird nicht gekürzt.
+
+    >>> _tree_sum([(1, 2), (1, 3), (1, 6)])
+    (6, 6)
+    >>> _tree_sum([])
+    (0, 1)
+    """
+    while len(paare) > 1:
+        neu = []
+        for i in range(0, len(paare) - 1, 2):
+            (a, b), (c, d) = paare[i], paare[i + 1]
+            neu.append((a + c, b) if b == d else (a * d + c * b, b * d))
+        if len(paare) % 2:
+            neu.append(paare[-1])
+        paare = neu
+    return paare[0] if paare else (0, 1)
+
+
+def _tree_prod(zahlen):
+    """
+    Multipliziert ganze Zahlen paarweise in einem Baum.
+
+    >>> _tree_prod([2, 3, 4, 5, 6])
+    720
+    >>> _tree_prod([])
+    1
+    """
+    while len(zahlen) > 1:
+        neu = [zahlen[i] * zahlen[i + 1] for i in range(0, len(zahlen) - 1, 2)]
+        if len(zahlen) % 2:
+            neu.append(zahlen[-1])
+        zahlen = neu
+    return zahlen[0] if zahlen else 1
+
+
 class Fraction:
     """Klasse für Bruchzahlen.
 
+    Ein Bruch ist immer gekürzt und hat einen positiven Nenner. Die Klasse
+    verwendet __slots__, damit Instanzen kein __dict__ brauchen.
+
     >>> f1 = Fraction(1, 2)
     >>> f1  # __repr__
     Fraction(1, 2)
     >>> print(f1)  # __str__
     1/2
+    >>> hasattr(f1, "__dict__")
+    False
     """
 
+    __slots__ = ("_numerator", "_denominator")
+
     def __init__(self, zaehler=0, nenner=1):
         """
         Initialisiert eine Bruchzahl mit Zähler und Nenner.
@@ -38,6 +88,20 @@ class Fraction:
         self._numerator = zaehler // g
         self._denominator = nenner // g
 
+    @classmethod
+    def _new(cls, zaehler, nenner):
+        """
+        Erzeugt einen Bruch ohne Prüfung und ohne Kürzen. Nur für Ergebnisse
+        verwenden, die bereits gekürzt sind und einen positiven Nenner haben.
+
+        >>> Fraction._new(3, 4)
+        Fraction(3, 4)
+        """
+        obj = object.__new__(cls)
+        obj._numerator = zaehler
+        obj._denominator = nenner
+        return obj
+
     def __str__(self):
         """
         Gibt den Bruch als lesbaren String zurück (z.B. 1 2/3).
@@ -112,15 +176,36 @@ class Fraction:
 
         >>> Fraction(-1, 2) + 1
         Fraction(1, 2)
+
+        >>> Fraction(1, 6) + Fraction(1, 10)
+        Fraction(4, 15)
         """
         if isinstance(other, int):
-            other = Fraction(other)
+            return Fraction._new(self._numerator + other * self._denominator, self._denominator)
         if isinstance(other, Fraction):
-            z = self._numerator * other._denominator + other._numerator * self._denominator
-            n = self._denominator * other._denominator
-            return Fraction(z, n)
+            return Fraction._add_sub(self._numerator, self._denominator,
+                                     other._numerator, other._denominator)
         return NotImplemented
 
+    @staticmethod
+    def _add_sub(a, b, c, d):
+        """
+        Berechnet a/b + c/d für gekürzte Brüche, ohne den vollen Nenner b*d
+        kürzen zu müssen (siehe Knuth, TAOCP Band 2, 4.5.1).
+
+        >>> Fraction._add_sub(1, 6, -1, 10)
+        Fraction(1, 15)
+        """
+        g = gcd(b, d)
+        if g == 1:
+            return Fraction._new(a * d + b * c, b * d)
+        s = d // g
+        t = a * s + c * (b // g)
+        g2 = gcd(t, g)
+        if g2 == 1:
+            return Fraction._new(t, s * b)
+        return Fraction._new(t // g2, s * (b // g2))
+
     def __radd__(self, other):
         """
         Ermöglicht Addition mit int auf der linken Seite.
@@ -136,13 +221,15 @@ class Fraction:
 
         >>> Fraction(3, 4) - Fraction(1, 2)
         Fraction(1, 4)
+
+        >>> Fraction(3, 4) - 1
+        Fraction(-1, 4)
         """
         if isinstance(other, int):
-            other = Fraction(other)
+            return Fraction._new(self._numerator - other * self._denominator, self._denominator)
         if isinstance(other, Fraction):
-            z = self._numerator * other._denominator - other._numerator * self._denominator
-            n = self._denominator * other._denominator
-            return Fraction(z, n)
+            return Fraction._add_sub(self._numerator, self._denominator,
+                                     -other._numerator, other._denominator)
         return NotImplemented
 
     def __rsub__(self, other):
@@ -152,7 +239,9 @@ class Fraction:
         >>> 1 - Fraction(1, 4)
         Fraction(3, 4)
         """
-        return Fraction(other) - self
+        if isinstance(other, int):
+            return Fraction._new(other * self._denominator - self._numerator, self._denominator)
+        return NotImplemented
 
     def __mul__(self, other):
         """
@@ -160,13 +249,31 @@ class Fraction:
 
         >>> Fraction(2, 3) * Fraction(3, 4)
         Fraction(1, 2)
+
+        >>> Fraction(5, 6) * 4
+        Fraction(10, 3)
         """
         if isinstance(other, int):
-            other = Fraction(other)
+            g = gcd(other, self._denominator)
+            return Fraction._new(self._numerator * (other // g), self._denominator // g)
         if isinstance(other, Fraction):
-            return Fraction(self._numerator * other._numerator, self._denominator * other._denominator)
+            return Fraction._mul(self._numerator, self._denominator,
+                                 other._numerator, other._denominator)
         return NotImplemented
 
+    @staticmethod
+    def _mul(a, b, c, d):
+        """
+        Berechnet (a/b) * (c/d) für gekürzte Brüche mit d > 0 durch
+        Kreuzkürzen, sodass das Ergebnis nicht mehr gekürzt werden muss.
+
+        >>> Fraction._mul(4, 9, 3, 8)
+        Fraction(1, 6)
+        """
+        g1 = gcd(a, d)
+        g2 = gcd(c, b)
+        return Fraction._new((a // g1) * (c // g2), (b // g2) * (d // g1))
+
     def __rmul__(self, other):
         """
         Ermöglicht Multiplikation mit int auf der linken Seite.
@@ -182,13 +289,32 @@ class Fraction:
 
         >>> Fraction(1, 2) / Fraction(1, 4)
         Fraction(2, 1)
+
+        >>> Fraction(1, 2) / Fraction(-3, 4)
+        Fraction(-2, 3)
+
+        >>> Fraction(4, 3) / -2
+        Fraction(-2, 3)
+
+        >>> Fraction(1, 2) / 0
+        Traceback (most recent call last):
+            ...
+        ArithmeticError: Division durch Null
         """
         if isinstance(other, int):
-            other = Fraction(other)
+            if other == 0:
+                raise ArithmeticError("Division durch Null")
+            g = gcd(self._numerator, other)
+            if other < 0:
+                g = -g
+            return Fraction._new(self._numerator // g, self._denominator * (other // g))
         if isinstance(other, Fraction):
-            if other._numerator == 0:
+            c, d = other._numerator, other._denominator
+            if c == 0:
                 raise ArithmeticError("Division durch Null")
-            return Fraction(self._numerator * other._denominator, self._denominator * other._numerator)
+            if c < 0:
+                c, d = -c, -d
+            return Fraction._mul(self._numerator, self._denominator, d, c)
         return NotImplemented
 
     def __rtruediv__(self, other):
@@ -197,8 +323,19 @@ class Fraction:
 
         >>> 1 / Fraction(1, 2)
         Fraction(2, 1)
+
+        >>> 3 / Fraction(-6, 5)
+        Fraction(-5, 2)
         """
-        return Fraction(other) / self
+        if isinstance(other, int):
+            z, n = self._numerator, self._denominator
+            if z == 0:
+                raise ArithmeticError("Division durch Null")
+            if z < 0:
+                z, n = -z, -n
+            g = gcd(other, z)
+            return Fraction._new((other // g) * n, z // g)
+        return NotImplemented
 
     def __floordiv__(self, other):
         """
@@ -206,9 +343,20 @@ class Fraction:
 
         >>> Fraction(5, 3) // Fraction(1, 2)
         Fraction(3, 1)
+
+        >>> Fraction(-5, 3) // 2
+        Fraction(-1, 1)
         """
-        result = self / other
-        return Fraction(result._numerator // result._denominator, 1)
+        if isinstance(other, int):
+            if other == 0:
+                raise ArithmeticError("Division durch Null")
+            return Fraction._new(self._numerator // (self._denominator * other), 1)
+        if isinstance(other, Fraction):
+            if other._numerator == 0:
+                raise ArithmeticError("Division durch Null")
+            return Fraction._new((self._numerator * other._denominator)
+                                 // (self._denominator * other._numerator), 1)
+        return NotImplemented
 
     def __rfloordiv__(self, other):
         """
@@ -217,7 +365,11 @@ class Fraction:
         >>> 2 // Fraction(1, 2)
         Fraction(4, 1)
         """
-        return Fraction(other) // self
+        if isinstance(other, int):
+            if self._numerator == 0:
+                raise ArithmeticError("Division durch Null")
+            return Fraction._new((other * self._denominator) // self._numerator, 1)
+        return NotImplemented
 
     def __eq__(self, other):
         """
@@ -225,13 +377,35 @@ class Fraction:
 
         >>> Fraction(1, 2) == Fraction(2, 4)
         True
+        >>> Fraction(4, 2) == 2
+        True
         """
         if isinstance(other, int):
-            other = Fraction(other)
+            return self._denominator == 1 and self._numerator == other
         if isinstance(other, Fraction):
             return (self._numerator == other._numerator) and (self._denominator == other._denominator)
         return NotImplemented
 
+    def __hash__(self):
+        """
+        Berechnet den Hashwert wie fractions.Fraction, damit gleiche Werte
+        (auch int und float) denselben Hash haben.
+
+        >>> hash(Fraction(4, 2)) == hash(2)
+        True
+        >>> hash(Fraction(1, 2)) == hash(0.5)
+        True
+        >>> len({Fraction(1, 2), Fraction(2, 4), Fraction(-1, 2)})
+        2
+        """
+        try:
+            dinv = pow(self._denominator, -1, _HASH_MODULUS)
+        except ValueError:
+            hash_ = _HASH_INF
+        else:
+            hash_ = hash(hash(abs(self._numerator)) * dinv)
+        result = hash_ if self._numerator >= 0 else -hash_
+        return -2 if result == -1 else result
 
     def __lt__(self, other):
         """
@@ -239,9 +413,11 @@ class Fraction:
 
         >>> Fraction(1, 3) < Fraction(1, 2)
         True
+        >>> Fraction(7, 2) < 4
+        True
         """
         if isinstance(other, int):
-            other = Fraction(other)
+            return self._numerator < other * self._denominator
         if isinstance(other, Fraction):
             return self._numerator * other._denominator < other._numerator * self._denominator
         return NotImplemented
@@ -276,3 +452,145 @@ class Fraction:
         4
         """
         return self._denominator
+
+    @staticmethod
+    def sum(werte):
+        """
+        Summiert viele Brüche bzw. ints und kürzt nur einmal am Ende
+        (siehe RationalAccumulator). Deutlich schneller als sum(werte).
+
+        >>> Fraction.sum([Fraction(1, 2), Fraction(1, 3), Fraction(1, 6), 1])
+        Fraction(2, 1)
+        >>> Fraction.sum([])
+        Fraction(0, 1)
+        """
+        acc = RationalAccumulator()
+        acc.extend(werte)
+        return acc.result()
+
+    @staticmethod
+    def prod(werte):
+        """
+        Multipliziert viele Brüche bzw. ints. Zähler und Nenner werden
+        getrennt im Baum multipliziert und nur einmal am Ende gekürzt.
+
+        >>> Fraction.prod([Fraction(1, 2), Fraction(2, 3), Fraction(-3, 4)])
+        Fraction(-1, 4)
+        >>> Fraction.prod([Fraction(2, 3), 3])
+        Fraction(2, 1)
+        """
+        zaehler, nenner = [], []
+        for w in werte:
+            if isinstance(w, Fraction):
+                zaehler.append(w._numerator)
+                nenner.append(w._denominator)
+            elif isinstance(w, int):
+                zaehler.append(w)
+            else:
+                raise TypeError("Nur Fraction und int können multipliziert werden")
+        z, n = _tree_prod(zaehler), _tree_prod(nenner)
+        g = gcd(z, n)
+        return Fraction._new(z // g, n // g)
+
+
+class RationalAccumulator:
+    """Summiert viele Brüche, ohne nach jedem Schritt zu kürzen.
+
+    Zähler mit gleichem Nenner werden in einem Dictionary direkt addiert.
+    Gibt es mehr als max_buckets verschiedene Nenner, werden diese paarweise
+    (Baum) in ein ungekürztes Paar zaehler/nenner übernommen. Gekürzt wird nur
+    am Ende oder wenn der Nenner länger als max_bits Bits wird.
+
+    >>> acc = RationalAccumulator()
+    >>> acc.add(Fraction(1, 4))
+    >>> acc.extend([Fraction(1, 4), Fraction(1, 3), 2])
+    >>> acc.result()
+    Fraction(17, 6)
+    """
+
+    __slots__ = ("_buckets", "_zaehler", "_nenner", "max_buckets", "max_bits")
+
+    def __init__(self, max_buckets=1024, max_bits=1 << 16):
+        """
+        Initialisiert einen leeren Akkumulator.
+
+        :param max_buckets: Maximale Anzahl verschiedener Nenner im Puffer.
+        :param max_bits: Ab dieser Länge des Nenners wird zwischendurch gekürzt.
+        """
+        self._buckets = {}
+        self._zaehler = 0
+        self._nenner = 1
+        self.max_buckets = max_buckets
+        self.max_bits = max_bits
+
+    def add(self, wert):
+        """
+        Addiert einen Bruch oder ein int.
+
+        >>> RationalAccumulator().add(0.5)
+        Traceback (most recent call last):
+            ...
+        TypeError: Nur Fraction und int können summiert werden
+        """
+        if isinstance(wert, Fraction):
+            z, n = wert._numerator, wert._denominator
+        elif isinstance(wert, int):
+            z, n = wert, 1
+        else:
+            raise TypeError("Nur Fraction und int können summiert werden")
+        buckets = self._buckets
+        if n in buckets:
+            buckets[n] += z
+        else:
+            buckets[n] = z
+            if len(buckets) > self.max_buckets:
+                self._flush()
+
+    def extend(self, werte):
+        """
+        Addiert alle Werte eines Iterables.
+
+        >>> acc = RationalAccumulator(max_buckets=2)
+        >>> acc.extend(Fraction(1, n) for n in range(1, 11))
+        >>> acc.result()
+        Fraction(7381, 2520)
+        """
+        buckets = self._buckets
+        max_buckets = self.max_buckets
+        for wert in werte:
+            if isinstance(wert, Fraction):
+                z, n = wert._numerator, wert._denominator
+            elif isinstance(wert, int):
+                z, n = wert, 1
+            else:
+                raise TypeError("Nur Fraction und int können summiert werden")
+            if n in buckets:
+                buckets[n] += z
+            else:
+                buckets[n] = z
+                if len(buckets) > max_buckets:
+                    self._flush()
+
+    def _flush(self):
+        """Übernimmt den Puffer in das ungekürzte Paar zaehler/nenner."""
+        paare = [(z, n) for n, z in self._buckets.items()]
+        paare.append((self._zaehler, self._nenner))
+        z, n = _tree_sum(paare)
+        self._buckets.clear()
+        if n.bit_length() > self.max_bits:
+            g = gcd(z, n)
+            z, n = z // g, n // g
+        self._zaehler, self._nenner = z, n
+
+    def result(self):
+        """
+        Liefert die gekürzte Summe aller bisher addierten Werte.
+
+        >>> RationalAccumulator().result()
+        Fraction(0, 1)
+        """
+        self._flush()
+        g = gcd(self._zaehler, self._nenner)
+        self._zaehler //= g
+        self._nenner //= g
+        return Fraction._new(self._zaehler, self._nenner)
@@ -0,0 +1,433 @@
+__author__ = "Felix Friesenbichler"
+__license__ = "GPLv2"
+__email__ = "1127@htl.rennweg.at"
+
+import operator
+
+import numpy as np
+
+from fraction import Fraction
+
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+def _bound(x):
+    """
+    Liefert den größten Betrag eines Arrays als Python-int.
+
+    >>> _bound(np.array([3, -7, 5]))
+    7
+    """
+    if x.size == 0:
+        return 0
+    return max(int(x.max()), -int(x.min()))
+
+
+def _to_object(*arrays):
+    """Wandelt Arrays in object-Arrays mit Python-ints um (exakt, ohne Überlauf)."""
+    return tuple(a.astype(object) for a in arrays)
+
+
+def _shrink(x):
+    """
+    Wandelt ein object-Array zurück in int64, wenn alle Werte hineinpassen.
+
+    >>> _shrink(np.array([1, 2], dtype=object)).dtype
+    dtype('int64')
+    >>> _shrink(np.array([1, 2 ** 70], dtype=object)).dtype
+    dtype('O')
+    """
+    if x.dtype == object and _bound(x) <= _INT64_MAX:
+        return x.astype(np.int64)
+    return x
+
+
+def _normalize(z, n):
+    """
+    Kürzt elementweise mit np.gcd und macht die Nenner positiv.
+
+    >>> z, n = _normalize(np.array([2, 3, 0]), np.array([-4, 9, 5]))
+    >>> z.tolist(), n.tolist()
+    ([-1, 1, 0], [2, 3, 1])
+    """
+    g = np.gcd(z, n)
+    g = np.where(n < 0, -g, g)
+    return _shrink(z // g), _shrink(n // g)
+
+
+def _add(a, b, c, d):
+    """Berechnet a/b + c/d elementweise; bei drohendem Überlauf mit Python-ints."""
+    ba, bb, bc, bd = _bound(a), _bound(b), _bound(c), _bound(d)
+    if ba * bd + bc * bb > _INT64_MAX or bb * bd > _INT64_MAX:
+        a, b, c, d = _to_object(a, b, c, d)
+    return _normalize(a * d + c * b, b * d)
+
+
+def _mul(a, b, c, d):
+    """Berechnet (a/b) * (c/d) elementweise; bei drohendem Überlauf mit Python-ints."""
+    if _bound(a) * _bound(c) > _INT64_MAX or _bound(b) * _bound(d) > _INT64_MAX:
+        a, b, c, d = _to_object(a, b, c, d)
+    return _normalize(a * c, b * d)
+
+
+def _cross(a, b, c, d):
+    """Liefert a*d und c*b für Vergleiche; bei drohendem Überlauf mit Python-ints."""
+    if _bound(a) * _bound(d) > _INT64_MAX or _bound(c) * _bound(b) > _INT64_MAX:
+        a, b, c, d = _to_object(a, b, c, d)
+    return a * d, c * b
+
+
+def _as_int_array(values):
+    """
+    Wandelt values in ein eindimensionales int64-Array um (object-Array für
+    Werte außerhalb von int64).
+    """
+    arr = np.asarray(values)
+    if arr.ndim == 0:
+        arr = arr.reshape(1)
+    if arr.ndim != 1:
+        raise ValueError("FractionArray muss eindimensional sein")
+    if arr.dtype == object:
+        if not all(isinstance(v, (int, np.integer)) for v in arr):
+            raise TypeError("Zähler und Nenner müssen ganze Zahlen sein")
+        return _shrink(np.array([int(v) for v in arr], dtype=object))
+    if arr.size == 0:
+        return arr.astype(np.int64)
+    if arr.dtype.kind not in "iu":
+        raise TypeError("Zähler und Nenner müssen ganze Zahlen sein")
+    if arr.dtype.kind == "u" and int(arr.max()) > _INT64_MAX:
+        return arr.astype(object)
+    return arr.astype(np.int64)
+
+
+class FractionArray:
+    """Spaltenorientiertes Array von Bruchzahlen.
+
+    Zähler und Nenner liegen in zwei NumPy-Arrays (int64), die Rechenoperationen
+    laufen elementweise und vektorisiert. Würde ein Ergebnis int64 überlaufen,
+    wird auf object-Arrays mit Python-ints umgestellt, sodass alle Ergebnisse
+    exakt bleiben.
+
+    >>> fa = FractionArray([1, 2, 3], [2, 4, 9])
+    >>> fa
+    FractionArray([1, 1, 1], [2, 2, 3])
+    >>> fa + 1
+    FractionArray([3, 3, 4], [2, 2, 3])
+    >>> fa[2]
+    Fraction(1, 3)
+    """
+
+    __slots__ = ("_numerators", "_denominators")
+
+    def __init__(self, zaehler=(), nenner=None):
+        """
+        Initialisiert das Array mit Zählern und Nennern (default = 1).
+
+        >>> FractionArray([1, 2], [0, 1])
+        Traceback (most recent call last):
+            ...
+        ArithmeticError: Nenner darf nicht 0 sein
+        >>> FractionArray([1], [2, 3])
+        Traceback (most recent call last):
+            ...
+        ValueError: Zähler und Nenner müssen gleich lang sein
+        """
+        z = _as_int_array(zaehler)
+        n = np.ones(len(z), dtype=np.int64) if nenner is None else _as_int_array(nenner)
+        if len(z) != len(n):
+            raise ValueError("Zähler und Nenner müssen gleich lang sein")
+        if (n == 0).any():
+            raise ArithmeticError("Nenner darf nicht 0 sein")
+        self._numerators, self._denominators = _normalize(z, n)
+
+    @classmethod
+    def _new(cls, zaehler, nenner):
+        """Erzeugt ein Array aus bereits gekürzten Zählern und Nennern."""
+        obj = object.__new__(cls)
+        obj._numerators = zaehler
+        obj._denominators = nenner
+        return obj
+
+    @classmethod
+    def from_fractions(cls, werte):
+        """
+        Erzeugt ein Array aus Fraction-Objekten oder ints.
+
+        >>> FractionArray.from_fractions([Fraction(1, 2), 3])
+        FractionArray([1, 3], [2, 1])
+        """
+        werte = [w if isinstance(w, Fraction) else Fraction(w) for w in werte]
+        z = _as_int_array(np.array([w.numerator for w in werte], dtype=object))
+        n = _as_int_array(np.array([w.denominator for w in werte], dtype=object))
+        return cls._new(z, n)
+
+    @property
+    def numerators(self):
+        """Gibt die Zähler als NumPy-Array zurück."""
+        return self._numerators
+
+    @property
+    def denominators(self):
+        """Gibt die Nenner als NumPy-Array zurück."""
+        return self._denominators
+
+    def __len__(self):
+        return len(self._numerators)
+
+    def __getitem__(self, index):
+        """
+        Liefert ein einzelnes Element als Fraction oder einen Ausschnitt als
+        FractionArray.
+
+        >>> FractionArray([1, 2, 3], [2, 3, 4])[1:]
+        FractionArray([2, 3], [3, 4])
+        """
+        z = self._numerators[index]
+        n = self._denominators[index]
+        if isinstance(z, np.ndarray):
+            return FractionArray._new(z, n)
+        return Fraction._new(int(z), int(n))
+
+    def __iter__(self):
+        for z, n in zip(self._numerators.tolist(), self._denominators.tolist()):
+            yield Fraction._new(z, n)
+
+    def __repr__(self):
+        return f"FractionArray({self._numerators.tolist()}, {self._denominators.tolist()})"
+
+    def to_list(self):
+        """
+        Gibt die Elemente als Liste von Fraction-Objekten zurück.
+
+        >>> FractionArray([1, 6], [2, 4]).to_list()
+        [Fraction(1, 2), Fraction(3, 2)]
+        """
+        return list(self)
+
+    def _coerce(self, other):
+        """Liefert Zähler und Nenner von other als Arrays oder None."""
+        if isinstance(other, FractionArray):
+            if len(other) != len(self):
+                raise ValueError("FractionArrays müssen gleich lang sein")
+            return other._numerators, other._denominators
+        if isinstance(other, int):
+            other = Fraction(other)
+        if isinstance(other, Fraction):
+            return _as_int_array(other.numerator), _as_int_array(other.denominator)
+        return None
+
+    def __add__(self, other):
+        """
+        Addiert elementweise.
+
+        >>> FractionArray([1, 1], [2, 3]) + FractionArray([1, 1], [2, 6])
+        FractionArray([1, 1], [1, 2])
+        >>> FractionArray([1], [2]) + Fraction(1, 3)
+        FractionArray([5], [6])
+        """
+        o = self._coerce(other)
+        if o is None:
+            return NotImplemented
+        return FractionArray._new(*_add(self._numerators, self._denominators, *o))
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return FractionArray._new(-self._numerators, self._denominators)
+
+    def __abs__(self):
+        return FractionArray._new(abs(self._numerators), self._denominators)
+
+    def __sub__(self, other):
+        """
+        Subtrahiert elementweise.
+
+        >>> FractionArray([3, 1], [4, 2]) - Fraction(1, 2)
+        FractionArray([1, 0], [4, 1])
+        """
+        o = self._coerce(other)
+        if o is None:
+            return NotImplemented
+        return FractionArray._new(*_add(self._numerators, self._denominators, -o[0], o[1]))
+
+    def __rsub__(self, other):
+        """
+        >>> 1 - FractionArray([1, 1], [4, 2])
+        FractionArray([3, 1], [4, 2])
+        """
+        return -self + other
+
+    def __mul__(self, other):
+        """
+        Multipliziert elementweise.
+
+        >>> FractionArray([2, 1], [3, 5]) * FractionArray([3, 10], [4, 1])
+        FractionArray([1, 2], [2, 1])
+        """
+        o = self._coerce(other)
+        if o is None:
+            return NotImplemented
+        return FractionArray._new(*_mul(self._numerators, self._denominators, *o))
+
+    __rmul__ = __mul__
+
+    def _reciprocal(self):
+        if (self._numerators == 0).any():
+            raise ArithmeticError("Division durch Null")
+        sign = np.where(self._numerators < 0, -1, 1)
+        return FractionArray._new(self._denominators * sign, self._numerators * sign)
+
+    def __truediv__(self, other):
+        """
+        Dividiert elementweise.
+
+        >>> FractionArray([1, 3], [2, 4]) / FractionArray([-1, 3], [4, 2])
+        FractionArray([-2, 1], [1, 2])
+        >>> FractionArray([1], [2]) / 0
+        Traceback (most recent call last):
+            ...
+        ArithmeticError: Division durch Null
+        """
+        o = self._coerce(other)
+        if o is None:
+            return NotImplemented
+        return self * FractionArray._new(*o)._reciprocal()
+
+    def __rtruediv__(self, other):
+        """
+        >>> 1 / FractionArray([2, -3], [1, 4])
+        FractionArray([1, -4], [2, 3])
+        """
+        return self._reciprocal() * other
+
+    def _compare(self, other, op):
+        o = self._coerce(other)
+        if o is None:
+            return NotImplemented
+        links, rechts = _cross(self._numerators, self._denominators, *o)
+        return op(links, rechts)
+
+    def __eq__(self, other):
+        """
+        Vergleicht elementweise und liefert ein bool-Array.
+
+        >>> FractionArray([1, 2], [2, 3]) == Fraction(1, 2)
+        array([ True, False])
+        """
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other):
+        return self._compare(other, operator.ne)
+
+    def __lt__(self, other):
+        """
+        >>> FractionArray([1, 2], [3, 3]) < Fraction(1, 2)
+        array([ True, False])
+        """
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    __hash__ = None
+
+    def _tree(self, combine, neutral):
+        """Reduziert paarweise in log2(n) vektorisierten Schritten."""
+        z, n = self._numerators, self._denominators
+        if len(z) == 0:
+            return Fraction(neutral)
+        while len(z) > 1:
+            if len(z) % 2:
+                z = np.append(z, neutral)
+                n = np.append(n, 1)
+            z, n = combine(z[0::2], n[0::2], z[1::2], n[1::2])
+        return Fraction._new(int(z[0]), int(n[0]))
+
+    def sum(self):
+        """
+        Summiert alle Elemente (paarweise, vektorisiert).
+
+        >>> FractionArray([1, 1, 1], [2, 3, 6]).sum()
+        Fraction(1, 1)
+        >>> FractionArray().sum()
+        Fraction(0, 1)
+        """
+        return self._tree(_add, 0)
+
+    def prod(self):
+        """
+        Multipliziert alle Elemente (paarweise, vektorisiert).
+
+        >>> FractionArray([1, 2, 3], [2, 3, 4]).prod()
+        Fraction(1, 4)
+        """
+        return self._tree(_mul, 1)
+
+    def mean(self):
+        """
+        >>> FractionArray([1, 2], [2, 1]).mean()
+        Fraction(5, 4)
+        """
+        if len(self) == 0:
+            raise ArithmeticError("Division durch Null")
+        return self.sum() / len(self)
+
+    def _select(self, op):
+        """Wählt paarweise das Element, für das op gegenüber dem Partner gilt."""
+        if len(self) == 0:
+            raise ValueError("Leeres FractionArray hat kein Minimum/Maximum")
+        z, n = self._numerators, self._denominators
+        while len(z) > 1:
+            if len(z) % 2:
+                z = np.append(z, z[-1])
+                n = np.append(n, n[-1])
+            a, b, c, d = z[0::2], n[0::2], z[1::2], n[1::2]
+            links, rechts = _cross(a, b, c, d)
+            erste = op(links, rechts)
+            z, n = np.where(erste, a, c), np.where(erste, b, d)
+        return Fraction._new(int(z[0]), int(n[0]))
+
+    def min(self):
+        """
+        >>> FractionArray([1, -1, 2], [2, 3, 5]).min()
+        Fraction(-1, 3)
+        """
+        return self._select(operator.le)
+
+    def max(self):
+        """
+        >>> FractionArray([1, -1, 2], [2, 3, 5]).max()
+        Fraction(1, 2)
+        """
+        return self._select(operator.ge)
+
+    def cumsum(self):
+        """
+        Kumulierte Summe als Präfix-Scan in log2(n) vektorisierten Schritten.
+
+        >>> FractionArray([1, 1, 1, 1], [2, 3, 6, 1]).cumsum()
+        FractionArray([1, 5, 1, 2], [2, 6, 1, 1])
+        """
+        z, n = self._numerators, self._denominators
+        shift = 1
+        while shift < len(z):
+            hz, hn = _add(z[shift:], n[shift:], z[:-shift], n[:-shift])
+            z = _shrink(np.concatenate((z[:shift], hz)))
+            n = _shrink(np.concatenate((n[:shift], hn)))
+            shift *= 2
+        return FractionArray._new(z, n)
+
+    def dot(self, other):
+        """
+        Skalarprodukt mit einem gleich langen FractionArray.
+
+        >>> FractionArray([1, 1], [2, 3]).dot(FractionArray([2, 3], [1, 1]))
+        Fraction(2, 1)
+        """
+        return (self * other).sum()
@@ -0,0 +1,228 @@
+__author__ = "Felix Friesenbichler"
+__license__ = "GPLv2"
+__email__ = "1127@htl.rennweg.at"
+
+import argparse
+import fractions
+import json
+import operator
+import platform
+import random
+import sys
+import tracemalloc
+from math import gcd
+from time import perf_counter
+
+from fraction import Fraction
+
+
+def _pair_make(z, n=1):
+    """
+    Gekürztes Paar (zaehler, nenner) als Vergleichsbasis ohne eigene Klasse.
+
+    >>> _pair_make(6, -8)
+    (-3, 4)
+    """
+    if n < 0:
+        z, n = -z, -n
+    g = gcd(z, n)
+    return z // g, n // g
+
+
+def _pair_add(p, q):
+    return _pair_make(p[0] * q[1] + q[0] * p[1], p[1] * q[1])
+
+
+def _pair_sub(p, q):
+    return _pair_make(p[0] * q[1] - q[0] * p[1], p[1] * q[1])
+
+
+def _pair_mul(p, q):
+    return _pair_make(p[0] * q[0], p[1] * q[1])
+
+
+def _pair_truediv(p, q):
+    return _pair_make(p[0] * q[1], p[1] * q[0])
+
+
+def _pair_floordiv(p, q):
+    return (p[0] * q[1]) // (p[1] * q[0]), 1
+
+
+def _pair_sum(paare):
+    ergebnis = (0, 1)
+    for p in paare:
+        ergebnis = _pair_add(ergebnis, p)
+    return ergebnis
+
+
+IMPLEMENTATIONS = {
+    "fraction": {
+        "make": Fraction,
+        "add": operator.add, "sub": operator.sub, "mul": operator.mul,
+        "truediv": operator.truediv, "floordiv": operator.floordiv,
+        "eq": operator.eq, "lt": operator.lt, "float": float, "str": str,
+        "sum": lambda xs: sum(xs, Fraction(0)),
+        "fast_sum": Fraction.sum,
+    },
+    "stdlib": {
+        "make": fractions.Fraction,
+        "add": operator.add, "sub": operator.sub, "mul": operator.mul,
+        "truediv": operator.truediv, "floordiv": operator.floordiv,
+        "eq": operator.eq, "lt": operator.lt, "float": float, "str": str,
+        "sum": lambda xs: sum(xs, fractions.Fraction(0)),
+    },
+    "intpair": {
+        "make": _pair_make,
+        "add": _pair_add, "sub": _pair_sub, "mul": _pair_mul,
+        "truediv": _pair_truediv, "floordiv": _pair_floordiv,
+        "eq": operator.eq, "lt": lambda p, q: p[0] * q[1] < q[0] * p[1],
+        "float": lambda p: p[0] / p[1], "str": lambda p: f"{p[0]}/{p[1]}",
+        "sum": _pair_sum,
+    },
+}
+
+BINARY_OPS = ("add", "sub", "mul", "truediv", "floordiv", "eq", "lt")
+UNARY_OPS = ("float", "str")
+SUM_OPS = ("sum", "fast_sum")
+
+
+def random_operands(anzahl, bits, seed=0):
+    """
+    Erzeugt Paare (zaehler, nenner) mit Beträgen bis 2**bits; Zähler und
+    Nenner sind nie 0, damit auch Divisionen gemessen werden können.
+
+    >>> len(random_operands(10, 8))
+    10
+    >>> all(z != 0 and n > 0 for z, n in random_operands(100, 8))
+    True
+    """
+    rng = random.Random(seed)
+    grenze = 2 ** bits
+    return [(rng.choice((-1, 1)) * rng.randint(1, grenze), rng.randint(1, grenze))
+            for _ in range(anzahl)]
+
+
+def _best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = perf_counter()
+        func()
+        best = min(best, perf_counter() - t0)
+    return best
+
+
+def bench_implementation(impl, operanden, repeat=5, sum_anzahl=200):
+    """
+    Misst ops/sec für alle Operationen einer Implementierung. Summiert wird
+    nur über die ersten sum_anzahl Operanden, weil exakte Summen zufälliger
+    Brüche quadratisch wachsen; angegeben werden dort Summanden/sec.
+
+    :param impl: Ein Eintrag aus IMPLEMENTATIONS.
+    :param operanden: Liste von Paaren (zaehler, nenner).
+    :param repeat: Wiederholungen, die beste Zeit zählt.
+    :param sum_anzahl: Anzahl der Summanden für die Summen-Messungen.
+    :return: Dictionary Operation -> ops/sec.
+
+    >>> r = bench_implementation(IMPLEMENTATIONS["intpair"], random_operands(50, 8), 1)
+    >>> sorted(r) == sorted(("make",) + BINARY_OPS + UNARY_OPS + ("sum",))
+    True
+    """
+    make = impl["make"]
+    n = len(operanden)
+    ergebnis = {"make": n / _best_time(lambda: [make(z, d) for z, d in operanden], repeat)}
+
+    xs = [make(z, d) for z, d in operanden]
+    paare = list(zip(xs, xs[1:] + xs[:1]))
+    for op in BINARY_OPS:
+        f = impl[op]
+        ergebnis[op] = n / _best_time(lambda: [f(x, y) for x, y in paare], repeat)
+    for op in UNARY_OPS:
+        f = impl[op]
+        ergebnis[op] = n / _best_time(lambda: [f(x) for x in xs], repeat)
+    summanden = xs[:sum_anzahl]
+    for op in SUM_OPS:
+        if op in impl:
+            f = impl[op]
+            ergebnis[op] = len(summanden) / _best_time(lambda: f(summanden), repeat)
+    return ergebnis
+
+
+def bytes_per_instance(make, operanden):
+    """
+    Misst mit tracemalloc den Speicher pro Instanz (inklusive der Zahlen,
+    die nur für diese Instanz angelegt werden).
+
+    >>> 0 < bytes_per_instance(Fraction, random_operands(1000, 8)) < 200
+    True
+    """
+    objekte = [None] * len(operanden)
+    tracemalloc.start()
+    vorher = tracemalloc.get_traced_memory()[0]
+    for i, (z, n) in enumerate(operanden):
+        objekte[i] = make(z, n)
+    nachher = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (nachher - vorher) / len(operanden)
+
+
+def run(anzahl, repeat=5, seed=0, sum_anzahl=200):
+    """Führt alle Messungen durch und liefert das Ergebnis als Dictionary."""
+    ergebnis = {
+        "python": platform.python_version(),
+        "n": anzahl,
+        "sum_n": min(anzahl, sum_anzahl),
+        "repeat": repeat,
+        "ops_per_sec": {},
+        "bytes_per_instance": {},
+    }
+    for groesse, bits in (("small", 10), ("large", 256)):
+        operanden = random_operands(anzahl, bits, seed)
+        for name, impl in IMPLEMENTATIONS.items():
+            ergebnis["ops_per_sec"].setdefault(name, {})[groesse] = bench_implementation(impl, operanden, repeat, sum_anzahl)
+            ergebnis["bytes_per_instance"].setdefault(name, {})[groesse] = bytes_per_instance(impl["make"], operanden)
+    return ergebnis
+
+
+def compare(alt, neu):
+    """
+    Liefert das Verhältnis neu/alt der ops/sec für alle gemeinsamen Messungen.
+
+    >>> compare({"ops_per_sec": {"a": {"small": {"add": 10}}}},
+    ...         {"ops_per_sec": {"a": {"small": {"add": 15}}}})
+    {'a': {'small': {'add': 1.5}}}
+    """
+    verhaeltnis = {}
+    for name, groessen in neu["ops_per_sec"].items():
+        for groesse, ops in groessen.items():
+            basis = alt["ops_per_sec"].get(name, {}).get(groesse, {})
+            for op, wert in ops.items():
+                if basis.get(op):
+                    verhaeltnis.setdefault(name, {}).setdefault(groesse, {})[op] = round(wert / basis[op], 3)
+    return verhaeltnis
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark für fraction.py im Vergleich zu fractions.Fraction")
+    parser.add_argument("-n", type=int, default=20000, help="Anzahl der Operanden")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Wiederholungen pro Messung")
+    parser.add_argument("-s", "--sum-n", type=int, default=200, help="Anzahl der Summanden für sum")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSON-Ausgabedatei (default: stdout)")
+    parser.add_argument("-c", "--compare", help="Frühere JSON-Ausgabe, mit der verglichen wird")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ergebnis = run(args.n, args.repeat, args.seed, args.sum_n)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            ergebnis["compared_to_baseline"] = compare(json.load(f), ergebnis)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(ergebnis, f, indent=2)
+    else:
+        json.dump(ergebnis, sys.stdout, indent=2)
+        print()
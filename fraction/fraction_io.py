@@ -0,0 +1,231 @@
+__author__ = "Felix Friesenbichler"
+__license__ = "GPLv2"
+__email__ = "1127@htl.rennweg.at"
+
+import re
+from contextlib import contextmanager
+from pathlib import Path
+
+from fraction import Fraction
+
+MAGIC = b"FRC1"
+
+_MIXED = re.compile(r"([+-]?)(?:(\d+)\s+)?(\d+)\s*/\s*(\d+)")
+_DECIMAL = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?(?:[eE]([+-]?\d+))?")
+_REPR = re.compile(r"Fraction\(\s*([+-]?\d+)\s*,\s*([+-]?\d+)\s*\)")
+
+
+def _parse_pair(text: str):
+    """
+    Zerlegt einen Text in ein (ungekürztes) Paar aus Zähler und Nenner.
+    Erlaubt sind "a/b", gemischte Zahlen "w a/b" (wie von __str__ ausgegeben),
+    ganze Zahlen, Dezimalzahlen mit optionalem Exponenten und "Fraction(a, b)".
+
+    >>> _parse_pair("3/4"), _parse_pair("-1 2/3"), _parse_pair("1.25")
+    ((3, 4), (-5, 3), (125, 100))
+    >>> _parse_pair("2.5e-1"), _parse_pair("Fraction(-3, 4)"), _parse_pair(" 7 ")
+    ((25, 100), (-3, 4), (7, 1))
+    >>> _parse_pair("1/x")
+    Traceback (most recent call last):
+        ...
+    ValueError: Ungültiger Bruch: '1/x'
+    """
+    s = text.strip()
+    if "/" in s:
+        if " " not in s:
+            z, _, n = s.partition("/")
+            if z.lstrip("+-").isdigit() and n.isdigit():
+                return int(z), int(n)
+        m = _MIXED.fullmatch(s)
+        if m:
+            vorzeichen, ganz, z, n = m.groups()
+            n = int(n)
+            z = int(z) + (int(ganz) * n if ganz else 0)
+            return (-z if vorzeichen == "-" else z), n
+    elif s.startswith("Fraction("):
+        m = _REPR.fullmatch(s)
+        if m:
+            return int(m.group(1)), int(m.group(2))
+    else:
+        m = _DECIMAL.fullmatch(s)
+        if m and (m.group(2) or m.group(3)):
+            vorzeichen, ganz, nachkomma, exponent = m.groups()
+            nachkomma = nachkomma or ""
+            z = int((ganz or "0") + nachkomma)
+            n = 10 ** len(nachkomma)
+            if exponent:
+                e = int(exponent)
+                if e >= 0:
+                    z *= 10 ** e
+                else:
+                    n *= 10 ** -e
+            return (-z if vorzeichen == "-" else z), n
+    raise ValueError(f"Ungültiger Bruch: {text!r}")
+
+
+def parse_fraction(text: str) -> Fraction:
+    """
+    Wandelt einen Text in eine Bruchzahl um. Sicherer Ersatz für eval(repr(x)).
+
+    >>> parse_fraction("6/8")
+    Fraction(3, 4)
+    >>> parse_fraction(str(Fraction(-7, 3)))
+    Fraction(-7, 3)
+    >>> parse_fraction(repr(Fraction(5, 6)))
+    Fraction(5, 6)
+    >>> parse_fraction("-0.125")
+    Fraction(-1, 8)
+    """
+    return Fraction(*_parse_pair(text))
+
+
+@contextmanager
+def _open(source, mode: str):
+    """Öffnet einen Pfad oder reicht einen bereits geöffneten Stream durch."""
+    if isinstance(source, (str, Path)):
+        encoding = None if "b" in mode else "utf-8"
+        with open(source, mode, encoding=encoding) as f:
+            yield f
+    else:
+        yield source
+
+
+def parse_fractions(source):
+    """
+    Liest Brüche zeilenweise aus einer Datei oder einem Text-Stream
+    (ein Wert pro Zeile, Leerzeilen werden übersprungen).
+
+    :param source: Pfad oder Text-Stream.
+    :return: Generator mit Fraction-Objekten.
+
+    >>> import io
+    >>> list(parse_fractions(io.StringIO("1/2\\n\\n1 1/2\\n0.75\\n")))
+    [Fraction(1, 2), Fraction(3, 2), Fraction(3, 4)]
+    """
+    with _open(source, "r") as f:
+        for zeile in f:
+            if zeile.strip():
+                yield Fraction(*_parse_pair(zeile))
+
+
+def read_fraction_array(source):
+    """
+    Liest Brüche wie parse_fractions direkt in ein FractionArray. Es werden
+    keine einzelnen Fraction-Objekte erzeugt, gekürzt wird vektorisiert.
+    Benötigt NumPy.
+
+    >>> import io
+    >>> read_fraction_array(io.StringIO("2/4\\n-1 1/3\\n"))
+    FractionArray([1, -4], [2, 3])
+    """
+    from fraction_array import FractionArray
+
+    zaehler = []
+    nenner = []
+    with _open(source, "r") as f:
+        for zeile in f:
+            if zeile.strip():
+                z, n = _parse_pair(zeile)
+                zaehler.append(z)
+                nenner.append(n)
+    return FractionArray(zaehler, nenner)
+
+
+def write_fractions(werte, target) -> None:
+    """
+    Schreibt Brüche (Fraction, int oder FractionArray) zeilenweise im Format
+    "a/b", das parse_fractions wieder einlesen kann.
+
+    >>> import io
+    >>> out = io.StringIO()
+    >>> write_fractions([Fraction(1, 2), Fraction(-5, 3), 4], out)
+    >>> out.getvalue()
+    '1/2\\n-5/3\\n4/1\\n'
+    """
+    with _open(target, "w") as f:
+        f.writelines(f"{w.numerator}/{w.denominator}\n" for w in werte)
+
+
+def _write_varint(out: bytearray, wert: int) -> None:
+    """Hängt eine nicht-negative Zahl als LEB128-Varint an."""
+    while wert >= 0x80:
+        out.append((wert & 0x7F) | 0x80)
+        wert >>= 7
+    out.append(wert)
+
+
+def _read_varint(data, pos: int):
+    """Liest einen LEB128-Varint ab pos; liefert Wert und neue Position."""
+    wert = 0
+    shift = 0
+    while True:
+        try:
+            b = data[pos]
+        except IndexError:
+            raise ValueError("Unerwartetes Dateiende") from None
+        pos += 1
+        wert |= (b & 0x7F) << shift
+        if b < 0x80:
+            return wert, pos
+        shift += 7
+
+
+def dumps_binary(werte) -> bytes:
+    """
+    Serialisiert Brüche kompakt: MAGIC, Anzahl als Varint, danach pro Bruch
+    der Zähler (zigzag-kodiert) und der Nenner als Varint.
+
+    >>> dumps_binary([Fraction(1, 2), Fraction(-3, 4)])
+    b'FRC1\\x02\\x02\\x02\\x05\\x04'
+    """
+    werte = list(werte)
+    out = bytearray(MAGIC)
+    _write_varint(out, len(werte))
+    for w in werte:
+        z = w.numerator
+        _write_varint(out, (z << 1) if z >= 0 else ((-z << 1) - 1))
+        _write_varint(out, w.denominator)
+    return bytes(out)
+
+
+def loads_binary(data: bytes):
+    """
+    Liest Brüche aus dem Format von dumps_binary.
+
+    >>> loads_binary(dumps_binary([Fraction(1, 2), Fraction(-3, 4), 2 ** 70]))
+    [Fraction(1, 2), Fraction(-3, 4), Fraction(1180591620717411303424, 1)]
+    >>> loads_binary(b"XXXX")
+    Traceback (most recent call last):
+        ...
+    ValueError: Kein Bruch-Binärformat
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Kein Bruch-Binärformat")
+    data = memoryview(data)
+    anzahl, pos = _read_varint(data, len(MAGIC))
+    werte = []
+    for _ in range(anzahl):
+        z, pos = _read_varint(data, pos)
+        n, pos = _read_varint(data, pos)
+        werte.append(Fraction(-((z + 1) >> 1) if z & 1 else z >> 1, n))
+    return werte
+
+
+def dump_binary(werte, target) -> None:
+    """
+    Schreibt Brüche im Binärformat in eine Datei oder einen Byte-Stream.
+
+    >>> import io
+    >>> buf = io.BytesIO()
+    >>> dump_binary([Fraction(2, 3)], buf)
+    >>> load_binary(io.BytesIO(buf.getvalue()))
+    [Fraction(2, 3)]
+    """
+    with _open(target, "wb") as f:
+        f.write(dumps_binary(werte))
+
+
+def load_binary(source):
+    """Liest Brüche im Binärformat aus einer Datei oder einem Byte-Stream."""
+    with _open(source, "rb") as f:
+        return loads_binary(f.read())
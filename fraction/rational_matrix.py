@@ -0,0 +1,241 @@
+__author__ = "Felix Friesenbichler"
+__license__ = "GPLv2"
+__email__ = "1127@htl.rennweg.at"
+
+from math import lcm, prod
+
+from fraction import Fraction
+
+
+def _bareiss(M, spalten):
+    """
+    Bruchfreie Gauß-Elimination nach Bareiss (in-place) über die ersten
+    spalten Spalten einer ganzzahligen Matrix M. Alle Divisionen gehen auf,
+    weil jeder Eintrag eine Unterdeterminante der Ausgangsmatrix ist.
+
+    :param M: Liste von Zeilen mit Python-ints, wird verändert.
+    :param spalten: Anzahl der Spalten, in denen Pivots gesucht werden.
+    :return: Liste der Pivotspalten und Vorzeichen der Zeilenvertauschungen.
+
+    >>> M = [[2, 1], [4, 5]]
+    >>> _bareiss(M, 2), M
+    (([0, 1], 1), [[2, 1], [0, 6]])
+    """
+    n = len(M)
+    prev = 1
+    sign = 1
+    r = 0
+    pivots = []
+    for c in range(spalten):
+        if r == n:
+            break
+        p = next((i for i in range(r, n) if M[i][c]), None)
+        if p is None:
+            continue
+        if p != r:
+            M[r], M[p] = M[p], M[r]
+            sign = -sign
+        Mr = M[r]
+        piv = Mr[c]
+        rest = Mr[c:]
+        for i in range(r + 1, n):
+            Mi = M[i]
+            f = Mi[c]
+            M[i] = Mi[:c] + [(piv * a - f * b) // prev for a, b in zip(Mi[c:], rest)]
+        prev = piv
+        pivots.append(c)
+        r += 1
+    return pivots, sign
+
+
+def _back_substitute(M, n, k):
+    """
+    Löst das obere Dreieckssystem aus _bareiss für die rechte Seite in
+    Spalte n + k. Gerechnet wird ganzzahlig mit y = d * x (d = M[n-1][n-1]);
+    erst das Ergebnis wird in Brüche umgewandelt.
+    """
+    d = M[n - 1][n - 1]
+    y = [0] * n
+    for i in range(n - 1, -1, -1):
+        Mi = M[i]
+        t = d * Mi[n + k] - sum(Mi[j] * y[j] for j in range(i + 1, n))
+        y[i] = t // Mi[i]
+    return [Fraction(v, d) for v in y]
+
+
+class RationalMatrix:
+    """Matrix aus Bruchzahlen mit exakter linearer Algebra.
+
+    Determinante, Lösen, Inverse und Rang werden bruchfrei mit dem
+    Bareiss-Verfahren berechnet: Jede Zeile wird mit dem kgV ihrer Nenner
+    ganzzahlig gemacht, in der inneren Schleife wird nur mit Python-ints
+    gerechnet und erst am Ende wieder in Fraction umgewandelt.
+
+    >>> A = RationalMatrix([[2, 1], [1, 3]])
+    >>> A.det()
+    Fraction(5, 1)
+    >>> A.solve([3, 4])
+    [Fraction(1, 1), Fraction(1, 1)]
+    """
+
+    __slots__ = ("_rows",)
+
+    def __init__(self, zeilen):
+        """
+        Initialisiert die Matrix mit einer Liste von Zeilen aus Fraction
+        bzw. int.
+
+        >>> RationalMatrix([[1, 2], [3]])
+        Traceback (most recent call last):
+            ...
+        ValueError: Alle Zeilen müssen gleich lang sein
+        """
+        self._rows = [[w if isinstance(w, Fraction) else Fraction(w) for w in zeile]
+                      for zeile in zeilen]
+        if len({len(zeile) for zeile in self._rows}) > 1:
+            raise ValueError("Alle Zeilen müssen gleich lang sein")
+
+    @classmethod
+    def identity(cls, n):
+        """
+        >>> RationalMatrix.identity(2)
+        RationalMatrix([[Fraction(1, 1), Fraction(0, 1)], [Fraction(0, 1), Fraction(1, 1)]])
+        """
+        return cls([[int(i == j) for j in range(n)] for i in range(n)])
+
+    @property
+    def shape(self):
+        """
+        >>> RationalMatrix([[1, 2, 3], [4, 5, 6]]).shape
+        (2, 3)
+        """
+        return len(self._rows), len(self._rows[0]) if self._rows else 0
+
+    def __getitem__(self, index):
+        i, j = index
+        return self._rows[i][j]
+
+    def __eq__(self, other):
+        if isinstance(other, RationalMatrix):
+            return self._rows == other._rows
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"RationalMatrix({self._rows!r})"
+
+    def to_list(self):
+        """Gibt die Zeilen als Liste von Listen zurück."""
+        return [list(zeile) for zeile in self._rows]
+
+    def _integer_rows(self, rechts=None):
+        """
+        Macht jede Zeile (inklusive rechter Seiten) durch Multiplikation mit
+        dem kgV ihrer Nenner ganzzahlig.
+
+        :param rechts: Optionale Zeilen, die rechts angehängt werden.
+        :return: Ganzzahlige Zeilen und die Liste der Skalierungsfaktoren.
+        """
+        zeilen = []
+        faktoren = []
+        for i, zeile in enumerate(self._rows):
+            if rechts is not None:
+                zeile = zeile + rechts[i]
+            s = lcm(*(w.denominator for w in zeile)) if zeile else 1
+            zeilen.append([w.numerator * (s // w.denominator) for w in zeile])
+            faktoren.append(s)
+        return zeilen, faktoren
+
+    def _require_square(self):
+        n, m = self.shape
+        if n != m:
+            raise ValueError("Matrix muss quadratisch sein")
+        return n
+
+    def det(self):
+        """
+        Berechnet die Determinante.
+
+        >>> RationalMatrix([[Fraction(1, 2), 1], [Fraction(1, 3), 1]]).det()
+        Fraction(1, 6)
+        >>> RationalMatrix([[1, 2], [2, 4]]).det()
+        Fraction(0, 1)
+        >>> RationalMatrix([[0, 1], [1, 0]]).det()
+        Fraction(-1, 1)
+        """
+        n = self._require_square()
+        if n == 0:
+            return Fraction(1)
+        M, faktoren = self._integer_rows()
+        pivots, sign = _bareiss(M, n)
+        if len(pivots) < n:
+            return Fraction(0)
+        return Fraction(sign * M[n - 1][n - 1], prod(faktoren))
+
+    def rank(self):
+        """
+        Berechnet den Rang.
+
+        >>> RationalMatrix([[1, 2, 3], [2, 4, 6], [1, 0, 1]]).rank()
+        2
+        >>> RationalMatrix([[0, 0], [0, 0]]).rank()
+        0
+        """
+        M, _ = self._integer_rows()
+        pivots, _ = _bareiss(M, self.shape[1])
+        return len(pivots)
+
+    def solve(self, b):
+        """
+        Löst das Gleichungssystem A x = b exakt.
+
+        :param b: Rechte Seite als Liste von Fraction bzw. int.
+        :return: Die Lösung x als Liste von Fraction.
+
+        >>> A = RationalMatrix([[Fraction(1, 2), 1], [0, Fraction(2, 3)]])
+        >>> A.solve([1, Fraction(1, 3)])
+        [Fraction(1, 1), Fraction(1, 2)]
+        >>> RationalMatrix([[1, 2], [2, 4]]).solve([1, 2])
+        Traceback (most recent call last):
+            ...
+        ArithmeticError: Matrix ist singulär
+        >>> RationalMatrix([]).solve([])
+        []
+        """
+        n = self._require_square()
+        if len(b) != n:
+            raise ValueError("Rechte Seite hat falsche Länge")
+        if n == 0:
+            return []
+        rechts = [[w if isinstance(w, Fraction) else Fraction(w)] for w in b]
+        M, _ = self._integer_rows(rechts)
+        pivots, _ = _bareiss(M, n)
+        if len(pivots) < n:
+            raise ArithmeticError("Matrix ist singulär")
+        return _back_substitute(M, n, 0)
+
+    def inverse(self):
+        """
+        Berechnet die Inverse exakt.
+
+        >>> A = RationalMatrix([[2, 1], [Fraction(1, 2), 1]])
+        >>> A.inverse()
+        RationalMatrix([[Fraction(2, 3), Fraction(-2, 3)], [Fraction(-1, 3), Fraction(4, 3)]])
+        >>> A.inverse().inverse() == A
+        True
+        >>> RationalMatrix([]).inverse()
+        RationalMatrix([])
+        """
+        n = self._require_square()
+        if n == 0:
+            return RationalMatrix([])
+        M, faktoren = self._integer_rows()
+        # A = D^-1 * M mit D = diag(faktoren), also löst M X = D die Gleichung A X = I.
+        for i, zeile in enumerate(M):
+            zeile.extend(faktoren[i] if i == j else 0 for j in range(n))
+        pivots, _ = _bareiss(M, n)
+        if len(pivots) < n:
+            raise ArithmeticError("Matrix ist singulär")
+        spalten = [_back_substitute(M, n, k) for k in range(n)]
+        return RationalMatrix([[spalten[k][i] for k in range(n)] for i in range(n)])
@@ -3,6 +3,19 @@ __author__      = "Felix Friesenbichler"
 __email__       = "1127@htl.rennweg.at"
 __license__     = "GPLv2"
 
+import codecs
+import mmap
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import isqrt
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+_NON_ALNUM = re.compile(r"[\W_]+")
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# Numbers with more bits are converted by divide and conquer in to_base.
+_DC_THRESHOLD_BITS = 2048
+
 
 def is_palindrome(s: str):
     """
@@ -22,7 +35,9 @@ def is_palindrome(s: str):
 def is_palindrome_sentence(s: str) -> bool:
     """
     Checks is the string s, which may contain a sentence, is a
-    palindrome sentence. >>> is_palindrome_sentence("Was it a car or a cat I saw?")
+    palindrome sentence. Everything except letters and digits is ignored.
+
+    >>> is_palindrome_sentence("Was it a car or a cat I saw?")
     True
 
     >>> is_palindrome_sentence("Do Geese see God?")
@@ -33,15 +48,183 @@ def is_palindrome_sentence(s: str) -> bool:
 
     >>> is_palindrome_sentence("Warsaw was raw")
     True
+
+    >>> is_palindrome_sentence("Eine güldne, gute Tugend: Lüge nie! (Rückert)")
+    False
     """
-    nonalnum = [' ', ',', '.', '!', '?', "'", '"', '-', ':', ';']
+    cleaned = normalize(s)
+    return cleaned == cleaned[::-1]
 
-    cleaned = ""
-    for char in s:
-        if char not in nonalnum:
-            cleaned += char.lower()
 
-    return cleaned == cleaned[::-1]
+def normalize(s: str) -> str:
+    """
+    Removes everything except letters and digits and converts the rest to
+    lower case (in linear time, with one regular expression).
+
+    >>> normalize("Do Geese see God?")
+    'dogeeseseegod'
+    >>> normalize("Ein Neger mit Gazelle zagt im Regen nie.")
+    'einnegermitgazellezagtimregennie'
+    """
+    return _NON_ALNUM.sub("", s).lower()
+
+
+def _forward_chunks(buffer, chunk_size: int) -> Iterator[str]:
+    """Yields the normalized UTF-8 text of buffer chunk by chunk from the start."""
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    for start in range(0, len(buffer), chunk_size):
+        yield normalize(decoder.decode(buffer[start:start + chunk_size]))
+    yield normalize(decoder.decode(b"", final=True))
+
+
+def _backward_chunks(buffer, chunk_size: int) -> Iterator[str]:
+    """
+    Yields the reversed normalized UTF-8 text of buffer chunk by chunk from
+    the end. Chunks start at character boundaries, so multi-byte characters
+    are never split.
+    """
+    end = len(buffer)
+    while end > 0:
+        start = max(0, end - chunk_size)
+        while start > 0 and buffer[start] & 0xC0 == 0x80:
+            start -= 1
+        yield normalize(bytes(buffer[start:end]).decode("utf-8", "replace"))[::-1]
+        end = start
+
+
+def _streams_equal(left: Iterator[str], right: Iterator[str]) -> bool:
+    """
+    Compares two streams of string chunks without joining them.
+
+    >>> _streams_equal(iter(["ab", "c"]), iter(["a", "bc"]))
+    True
+    >>> _streams_equal(iter(["ab"]), iter(["a", "bc"]))
+    False
+    """
+    a = b = ""
+    while True:
+        while not a:
+            a = next(left, None)
+            if a is None:
+                break
+        while not b:
+            b = next(right, None)
+            if b is None:
+                break
+        if a is None or b is None:
+            return a is None and b is None
+        n = min(len(a), len(b))
+        if a[:n] != b[:n]:
+            return False
+        a, b = a[n:], b[n:]
+
+
+def is_palindrome_buffer(buffer, chunk_size: int = 1 << 20) -> bool:
+    """
+    Checks if the UTF-8 text in buffer (bytes or mmap) is a palindrome
+    sentence. The text is normalized chunk by chunk from both ends and the
+    two streams are compared, so only a constant amount of extra memory is
+    needed.
+
+    :param buffer: UTF-8 encoded text
+    :param chunk_size: Number of bytes which are normalized at once
+    :return: True if the text is a palindrome sentence
+
+    >>> is_palindrome_buffer("Ein Neger mit Gazelle zagt im Regen nie.".encode(), chunk_size=3)
+    True
+    >>> is_palindrome_buffer("Äbä! Ab? Ä".encode(), chunk_size=1)
+    False
+    >>> is_palindrome_buffer("Ä b, Ä".encode(), chunk_size=1)
+    True
+    """
+    return _streams_equal(_forward_chunks(buffer, chunk_size), _backward_chunks(buffer, chunk_size))
+
+
+def is_palindrome_file(path, chunk_size: int = 1 << 20) -> bool:
+    """
+    Checks if a (possibly huge) UTF-8 text file is a palindrome sentence.
+    The file is memory-mapped instead of being read into memory.
+
+    :param path: Path of the text file
+    :param chunk_size: Number of bytes which are normalized at once
+    :return: True if the text is a palindrome sentence
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return True
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return is_palindrome_buffer(mm, chunk_size)
+
+
+def _manacher(t: str) -> Tuple[int, int]:
+    """
+    Finds the longest palindromic substring of t in O(n) with Manacher's
+    algorithm.
+
+    :return: Tuple (start, length)
+
+    >>> _manacher("abacdfgdcaba"), _manacher("cbbd"), _manacher("")
+    ((0, 3), (1, 2), (0, 0))
+    """
+    n = len(t)
+    best_start, best_len = 0, 0
+
+    # Radii are at most n / 2 + 1, so 4 bytes per character are enough.
+    typecode = "i" if n < 1 << 32 else "q"
+    radius = array(typecode, bytes(array(typecode).itemsize * n))
+    left, right = 0, -1
+    for i in range(n):
+        k = 1 if i > right else min(radius[left + right - i], right - i + 1)
+        while i - k >= 0 and i + k < n and t[i - k] == t[i + k]:
+            k += 1
+        radius[i] = k
+        if 2 * k - 1 > best_len:
+            best_start, best_len = i - k + 1, 2 * k - 1
+        if i + k - 1 > right:
+            left, right = i - k + 1, i + k - 1
+
+    # Second pass for even lengths, reusing the radius array.
+    left, right = 0, -1
+    for i in range(n):
+        k = 0 if i > right else min(radius[left + right - i + 1], right - i + 1)
+        while i - k - 1 >= 0 and i + k < n and t[i - k - 1] == t[i + k]:
+            k += 1
+        radius[i] = k
+        if 2 * k > best_len:
+            best_start, best_len = i - k, 2 * k
+        if i + k - 1 > right:
+            left, right = i - k, i + k - 1
+
+    return best_start, best_len
+
+
+def longest_palindrome(s: str) -> str:
+    """
+    Finds the longest palindromic substring of the normalized string s
+    (see normalize) in linear time.
+
+    >>> longest_palindrome("Hello, was it a car or a cat I saw? Bye")
+    'wasitacaroracatisaw'
+    """
+    t = normalize(s)
+    start, length = _manacher(t)
+    return t[start:start + length]
+
+
+def longest_palindrome_file(path, chunk_size: int = 1 << 20) -> str:
+    """
+    Finds the longest palindromic substring of the normalized text of a UTF-8
+    file. The file is memory-mapped and normalized chunk by chunk, but unlike
+    is_palindrome_file this holds the whole normalized text in memory, plus
+    the radius array of Manacher's algorithm (4 bytes per character).
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            t = "".join(_forward_chunks(mm, chunk_size))
+    start, length = _manacher(t)
+    return t[start:start + length]
 
 
 def palindrome_product(x):
@@ -54,26 +237,141 @@ def palindrome_product(x):
         ...
     ValueError: x must be numeric
 
+    >>> palindrome_product(10**6)
+    906609
+    906609
     """
 
     if not str(x).isdigit():
         raise ValueError("x must be numeric")
 
+    result = largest_palindrome_product(int(x), 3)
+    max_pal = result[0] if result else 1
 
-    max_pal = 1
-    last_pal = 1
-    for i in range(100, 999):
+    print(max_pal)
+    return max_pal
 
-        for j in range(100, 999):
-            heir = i * j
 
-            if is_palindrome(str(heir)) and heir < x:
-                last_pal = max_pal
-                max_pal = heir
+def num_digits(number: int, base: int = 10) -> int:
+    """
+    Counts the digits of a non-negative number in the given base.
 
+    >>> num_digits(255, 16), num_digits(256, 16), num_digits(0)
+    (2, 3, 1)
+    """
+    count = 1
+    while number >= base:
+        number //= base
+        count += 1
+    return count
+
+
+def is_palindrome_in_base(number: int, base: int) -> bool:
+    """
+    Checks if number is a palindrome in the given base by reversing its
+    digits arithmetically (without building a string).
+
+    >>> is_palindrome_in_base(626, 16), is_palindrome_in_base(979, 16)
+    (True, True)
+    >>> is_palindrome_in_base(10, 10), is_palindrome_in_base(0, 2)
+    (False, True)
+    """
+    if number < 0:
+        return False
+    if number % base == 0:
+        return number == 0
+    rev, rest = 0, number
+    while rest:
+        rest, digit = divmod(rest, base)
+        rev = rev * base + digit
+    return rev == number
+
+
+def _palindromes_of_length(length: int, h_hi: int, h_lo: int, base: int) -> Iterator[int]:
+    """
+    Generates the palindromes with the given number of digits whose first
+    half lies in [h_lo, h_hi], in descending order.
+
+    >>> list(_palindromes_of_length(3, 12, 10, 10))
+    [121, 111, 101]
+    """
+    shift = base ** (length // 2)
+    for h in range(h_hi, h_lo - 1, -1):
+        mirror = h if length % 2 == 0 else h // base
+        rev = 0
+        while mirror:
+            mirror, digit = divmod(mirror, base)
+            rev = rev * base + digit
+        yield h * shift + rev
 
-    print(max_pal)
-    return max_pal
+
+def palindromes_below(x: int, max_length: Optional[int] = None, base: int = 10) -> Iterator[int]:
+    """
+    Generates all palindromes smaller than x (in the given base) in
+    descending order by mirroring their first half.
+
+    :param x: Upper limit (exclusive)
+    :param max_length: Optional maximum number of digits
+    :param base: Base in which the numbers are palindromes
+    :return: Iterator over the palindromes
+
+    >>> list(palindromes_below(130))
+    [121, 111, 101, 99, 88, 77, 66, 55, 44, 33, 22, 11, 9, 8, 7, 6, 5, 4, 3, 2, 1, 0]
+    >>> [to_base(p, 2) for p in palindromes_below(8, base=2)]
+    ['111', '101', '11', '1', '0']
+    """
+    if x <= 0:
+        return
+    length = num_digits(x - 1, base)
+    if max_length is not None:
+        length = min(length, max_length)
+    for n in range(length, 0, -1):
+        half = (n + 1) // 2
+        for p in _palindromes_of_length(n, base ** half - 1, base ** (half - 1), base):
+            if p < x:
+                yield p
+    yield 0
+
+
+def largest_palindrome_product(x: int, digits: int = 3) -> Optional[Tuple[int, int, int]]:
+    """
+    Finds the biggest palindrome smaller than x which is the product of two
+    numbers with the given number of digits. Instead of trying all pairs of
+    factors, the palindromes are enumerated in descending order and each one
+    is tested with a bounded divisor search. Palindromes with an even number
+    of digits are divisible by 11, so one factor has to be a multiple of 11.
+
+    :param x: Upper limit (exclusive)
+    :param digits: Number of digits of both factors
+    :return: Tuple (palindrome, a, b) with a <= b, or None if there is none
+
+    >>> largest_palindrome_product(10**6)
+    (906609, 913, 993)
+    >>> largest_palindrome_product(10**4, 2)
+    (9009, 91, 99)
+    >>> largest_palindrome_product(10**12, 6)
+    (999000000999, 999001, 999999)
+    >>> largest_palindrome_product(100, 2) is None
+    True
+    """
+    lo = 10 ** (digits - 1)
+    hi = 10 ** digits - 1
+    for p in palindromes_below(x, 2 * digits):
+        if p < lo * lo:
+            return None
+        a_min = max(-(-p // hi), lo)
+        a_max = min(hi, p // lo)
+        if len(str(p)) % 2 == 0:
+            start = a_max - a_max % 11
+            for a in range(start, a_min - 1, -11):
+                if p % a == 0:
+                    b = p // a
+                    return (p, min(a, b), max(a, b))
+        else:
+            for a in range(a_max, max(a_min, isqrt(p)) - 1, -1):
+                if p % a == 0:
+                    return (p, p // a, a)
+    return None
 
 
 def to_base(number: int, base: int) -> str:
@@ -85,22 +383,133 @@ def to_base(number: int, base: int) -> str:
     :param base: Zielsystem (maximal 36)
     :return: Zahl im Zielsystem als String
 
+    Small numbers are converted digit by digit, bases which are powers of
+    two via the binary representation (linear), and big numbers by divide
+    and conquer: the number is split by precomputed powers base**(2**k)
+    into halves with about the same number of digits.
+
     >>> to_base(1234,16)
     '4D2'
     >>> to_base(10,2)
     '1010'
+    >>> to_base(0, 7), to_base(-255, 16)
+    ('0', '-FF')
+    >>> to_base(3 ** 5000, 3) == "1" + "0" * 5000
+    True
     """
     if base > 36 or base < 2:
-        raise ValueError("Base must be between 2 and 30")
+        raise ValueError("Base must be between 2 and 36")
 
-    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    result = ""
+    if number < 0:
+        return "-" + to_base(-number, base)
+    if base & (base - 1) == 0:
+        return _to_base_pow2(number, base)
+    if number.bit_length() <= _DC_THRESHOLD_BITS:
+        return _to_base_small(number, base)
+    return _to_base_dc(number, base)
 
-    while number > 0:
-        result = digits[number % base] + result
-        number //= base
 
-    return result
+def _to_base_small(number: int, base: int) -> str:
+    """
+    Converts a non-negative number digit by digit (collecting the digits in
+    a list instead of prepending to a string).
+
+    >>> _to_base_small(0, 5), _to_base_small(1234, 7)
+    ('0', '3412')
+    """
+    if base == 10:
+        return str(number)
+    result = []
+    while number:
+        number, digit = divmod(number, base)
+        result.append(DIGITS[digit])
+    return "".join(reversed(result)) or "0"
+
+
+def _to_base_pow2(number: int, base: int) -> str:
+    """
+    Converts a non-negative number into a base 2**k by grouping k bits of
+    its binary representation, which takes linear time.
+
+    >>> _to_base_pow2(1234, 16), _to_base_pow2(1234, 32), _to_base_pow2(0, 4)
+    ('4D2', '16I', '0')
+    """
+    bits = base.bit_length() - 1
+    binary = format(number, "b")
+    binary = binary.zfill(-(-len(binary) // bits) * bits)
+    return "".join(DIGITS[int(binary[i:i + bits], 2)] for i in range(0, len(binary), bits))
+
+
+def _to_base_dc(number: int, base: int) -> str:
+    """
+    Converts a big non-negative number by divide and conquer.
+
+    >>> n = 7 ** 3000 + 12345
+    >>> _to_base_dc(n, 10) == _to_base_small(n, 10) and _to_base_dc(n, 36) == _to_base_small(n, 36)
+    True
+    """
+    powers = [base]
+    while powers[-1].bit_length() * 2 <= number.bit_length() + 1:
+        powers.append(powers[-1] * powers[-1])
+
+    def convert(n: int, k: int, width: int) -> str:
+        if k < 0 or n.bit_length() <= _DC_THRESHOLD_BITS:
+            s = _to_base_small(n, base)
+            return s.rjust(width, "0") if width else s
+        half = 1 << k
+        high, low = divmod(n, powers[k])
+        low_str = convert(low, k - 1, half)
+        if not high and not width:
+            return low_str.lstrip("0") or "0"
+        return convert(high, k - 1, width - half if width else 0) + low_str
+
+    return convert(number, len(powers) - 1, 0)
+
+
+def to_base_array(numbers, base: int, width: Optional[int] = None):
+    """
+    Converts a NumPy array of non-negative ints into a matrix of digits
+    (most significant digit first) with a fixed width. All numbers are
+    processed at once, one vectorized divmod per digit. Requires NumPy.
+
+    :param numbers: Array-like of non-negative ints (fits into int64)
+    :param base: Target base (2 to 36)
+    :param width: Number of digits, default is the width of the largest number
+    :return: Array of digit values with shape numbers.shape + (width,)
+
+    >>> to_base_array([1234, 10, 0], 16).tolist()
+    [[4, 13, 2], [0, 0, 10], [0, 0, 0]]
+    """
+    import numpy as np
+
+    if base > 36 or base < 2:
+        raise ValueError("Base must be between 2 and 36")
+    rest = np.array(numbers, dtype=np.int64)
+    if (rest < 0).any():
+        raise ValueError("Numbers must not be negative")
+    if width is None:
+        width = num_digits(int(rest.max()), base) if rest.size else 1
+    matrix = np.empty(rest.shape + (width,), dtype=np.uint8)
+    for i in range(width - 1, -1, -1):
+        rest, matrix[..., i] = np.divmod(rest, base)
+    if rest.any():
+        raise ValueError("Width is too small for the given numbers")
+    return matrix
+
+
+def digit_matrix_to_strings(matrix):
+    """
+    Converts a digit matrix from to_base_array into an array of fixed-width
+    strings without a Python loop. Requires NumPy.
+
+    >>> digit_matrix_to_strings(to_base_array([1234, 10, 0], 16)).tolist()
+    ['4D2', '00A', '000']
+    """
+    import numpy as np
+
+    width = matrix.shape[-1]
+    chars = np.ascontiguousarray(np.array(list(DIGITS))[matrix])
+    return chars.view(f"<U{width}")[..., 0]
 
 
 def get_dec_hex_palindrome(x):
@@ -116,12 +525,74 @@ def get_dec_hex_palindrome(x):
     >>> get_dec_hex_palindrome(1500)
     979
     """
-    largest_palindrome = 0
+    return largest_multibase_palindrome(x, (10, 16)) or 0
 
-    for num in range(0, x):
-        decimal_str = str(num)
-        hex_str = to_base(num, 16).upper()
-        if is_palindrome(decimal_str) and is_palindrome(hex_str):
-            largest_palindrome = num
 
-    return largest_palindrome
+def _search_palindromes(x: int, length: int, h_hi: int, h_lo: int,
+                        base: int, others: Sequence[int]) -> Optional[int]:
+    """
+    Returns the biggest palindrome (in base) smaller than x with the given
+    length and first half in [h_lo, h_hi] that is also a palindrome in all
+    other bases, or None.
+    """
+    for p in _palindromes_of_length(length, h_hi, h_lo, base):
+        if p < x and all(is_palindrome_in_base(p, b) for b in others):
+            return p
+    return None
+
+
+def largest_multibase_palindrome(x: int, bases: Iterable[int] = (10, 16),
+                                 processes: Optional[int] = None) -> Optional[int]:
+    """
+    Finds the largest number less than x that is a palindrome in all given
+    bases. Only the palindromes of one base (10 if present, else the
+    largest base) are constructed, about sqrt(x) of them, in descending
+    order; the other bases are checked by arithmetic digit reversal.
+
+    :param x: Upper limit (exclusive)
+    :param bases: Bases in which the number has to be a palindrome
+    :param processes: If > 1, the half-space of each length is split into
+        chunks that are searched by a process pool
+    :return: The largest such number, or None if x <= 0
+
+    >>> largest_multibase_palindrome(1500)
+    979
+    >>> largest_multibase_palindrome(10**6, (2, 10))
+    585585
+    >>> largest_multibase_palindrome(10**7, (2, 10), processes=2)
+    5841485
+    >>> largest_multibase_palindrome(10**6, (2, 10, 16))
+    9
+    """
+    bases = tuple(bases)
+    for b in bases:
+        if b < 2:
+            raise ValueError("Base must be at least 2")
+    if x <= 0:
+        return None
+    base = 10 if 10 in bases else max(bases)
+    others = tuple(b for b in bases if b != base)
+    pool = ProcessPoolExecutor(processes) if processes and processes > 1 else None
+    try:
+        for n in range(num_digits(x - 1, base), 0, -1):
+            half = (n + 1) // 2
+            h_hi, h_lo = base ** half - 1, base ** (half - 1)
+            if pool is None:
+                result = _search_palindromes(x, n, h_hi, h_lo, base, others)
+            else:
+                size = max(1, -(-(h_hi - h_lo + 1) // (processes * 4)))
+                futures = [pool.submit(_search_palindromes, x, n, hi, max(hi - size + 1, h_lo), base, others)
+                           for hi in range(h_hi, h_lo - 1, -size)]
+                result = None
+                for future in futures:
+                    result = future.result()
+                    if result is not None:
+                        break
+                for future in futures:
+                    future.cancel()
+            if result is not None:
+                return result
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return 0
@@ -3,8 +3,145 @@ __license__ = "GPLv2"
 __email__ = "1127@htl.rennweg.at"
 
 import argparse
+import sys
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional, Tuple
+
 import pandas as pd
 
+SUBJECT_COLUMN = "Gegenstand"
+GRADE_COLUMN = "Note"
+CHUNK_SIZE = 100_000
+
+
+def iter_student_records(source) -> Iterator[Dict[str, str]]:
+    """
+    Liest die Schülerdaten mit iterparse: jedes Kind-Element der Wurzel ist
+    ein Datensatz, dessen Attribute und Unterelemente die Felder sind.
+    Bereits gelesene Elemente werden sofort wieder freigegeben.
+
+    >>> import io
+    >>> xml = b'<schueler><s Nummer="1"><Name>Anna</Name></s><s Nummer="2"><Name>Ben</Name></s></schueler>'
+    >>> list(iter_student_records(io.BytesIO(xml)))
+    [{'Nummer': '1', 'Name': 'Anna'}, {'Nummer': '2', 'Name': 'Ben'}]
+    """
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+    depth = 0
+    for event, elem in context:
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            record = dict(elem.attrib)
+            for child in elem:
+                record[child.tag] = (child.text or "").strip()
+            yield record
+            root.clear()
+
+
+def read_students(source, key: str) -> pd.DataFrame:
+    """
+    Liest die Schülerdaten spaltenweise in ein DataFrame. Der Schlüssel wird
+    als string gelesen, Spalten mit vielen Wiederholungen (z.B. Klasse)
+    werden kategorisch gespeichert. Die Spalten stehen in der Reihenfolge,
+    in der die Felder zum ersten Mal vorkommen.
+
+    >>> import io
+    >>> xml = (b'<schueler><s Nummer="1"><Name>Anna</Name><Klasse>5A</Klasse></s>'
+    ...        b'<s Nummer="2"><Name>Ben</Name><Klasse>5A</Klasse></s>'
+    ...        b'<s Nummer="3"><Name>Cem</Name><Klasse>5A</Klasse></s>'
+    ...        b'<s Nummer="4"><Klasse>5B</Klasse><Name>Dana</Name></s></schueler>')
+    >>> students = read_students(io.BytesIO(xml), "Nummer")
+    >>> students.dtypes.astype(str).to_dict()
+    {'Nummer': 'string', 'Name': 'object', 'Klasse': 'category'}
+    """
+    columns: Dict[str, list] = {}
+    count = 0
+    for record in iter_student_records(source):
+        for name in record:
+            if name not in columns:
+                columns[name] = [None] * count
+        for name, values in columns.items():
+            values.append(record.get(name))
+        count += 1
+
+    students = pd.DataFrame(columns)
+    if key not in students.columns:
+        raise ValueError(f"Spalte {key!r} fehlt in den Schülerdaten")
+    students[key] = students[key].astype("string")
+    for name in students.columns.drop(key):
+        if students[name].nunique() * 2 <= len(students):
+            students[name] = students[name].astype("category")
+    return students
+
+
+def grade_dtypes(path: str, key: str) -> Dict[str, str]:
+    """Legt die Datentypen der Noten-Datei anhand ihrer Kopfzeile fest."""
+    header = pd.read_csv(path, nrows=0).columns
+    if key not in header:
+        raise ValueError(f"Spalte {key!r} fehlt in {path}")
+    dtypes = {key: "string"}
+    if SUBJECT_COLUMN in header:
+        dtypes[SUBJECT_COLUMN] = "category"
+    if GRADE_COLUMN in header:
+        dtypes[GRADE_COLUMN] = "Int8"
+    return dtypes
+
+
+def merge_grades(grades_path: str, outfile: str, students: Optional[pd.DataFrame] = None,
+                 key: str = "Nummer", subject: Optional[str] = None, verbose: bool = False,
+                 chunksize: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Liest die Noten blockweise, filtert sie schon beim Lesen nach dem
+    Gegenstand, verknüpft jeden Block über key mit den Schülerdaten und
+    hängt das Ergebnis an outfile an. Es ist immer nur ein Block im Speicher.
+
+    :return: Anzahl der gelesenen und der geschriebenen Zeilen
+
+    >>> import io, os, tempfile
+    >>> xml = b'<schueler><s Nummer="1"><Name>Anna</Name></s><s Nummer="2"><Name>Ben</Name></s></schueler>'
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     noten = os.path.join(d, "noten.csv")
+    ...     with open(noten, "w", encoding="utf-8") as f:
+    ...         _ = f.write("Nummer,Gegenstand,Note\\n1,SEW,2\\n2,AM,1\\n2,SEW,1\\n3,SEW,5\\n")
+    ...     out = os.path.join(d, "result.csv")
+    ...     counts = merge_grades(noten, out, read_students(io.BytesIO(xml), "Nummer"),
+    ...                           "Nummer", "SEW", chunksize=2)
+    ...     with open(out, encoding="utf-8") as f:
+    ...         result = f.read()
+    >>> counts
+    (4, 2)
+    >>> print(result, end="")
+    Nummer,Gegenstand,Note,Name
+    1,SEW,2,Anna
+    2,SEW,1,Ben
+    """
+    dtypes = grade_dtypes(grades_path, key)
+    if subject is not None and SUBJECT_COLUMN not in dtypes:
+        raise ValueError(f"Spalte {SUBJECT_COLUMN!r} fehlt in {grades_path}")
+
+    read = written = 0
+    for chunk in pd.read_csv(grades_path, dtype=dtypes, chunksize=chunksize):
+        read += len(chunk)
+        if subject is not None:
+            chunk = chunk[chunk[SUBJECT_COLUMN] == subject]
+        if students is not None:
+            chunk = chunk.merge(students, on=key, how="inner")
+        if chunk.empty:
+            continue
+        chunk.to_csv(outfile, mode="a" if written else "w", header=not written, index=False)
+        written += len(chunk)
+        if verbose:
+            print(chunk.to_string(index=False, header=written == len(chunk)))
+    if not written:
+        columns = list(pd.read_csv(grades_path, nrows=0).columns)
+        if students is not None:
+            columns += [name for name in students.columns if name != key]
+        pd.DataFrame(columns=columns).to_csv(outfile, index=False)
+    return read, written
+
 
 def parse_args():
     """Parse command-line arguments."""
@@ -21,4 +158,18 @@ def parse_args():
     return parser.parse_args()
 
 if __name__ == "__main__":
-    parse_args()
+    args = parse_args()
+    if not args.n:
+        print("Keine Noten-Datei angegeben (-n)", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        students = read_students(args.s, args.m) if args.s else None
+        read, written = merge_grades(args.n, args.outfile, students, args.m, args.f,
+                                     args.verbose and not args.quiet)
+    except (OSError, ValueError, ET.ParseError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not args.quiet:
+        print(f"{read} Noten gelesen, {written} Zeilen nach {args.outfile} geschrieben")
@@ -3,25 +3,361 @@ __author__ = "Felix Friesenbichler"
 __email__ = "1127@htl.rennweg.at"
 __license__ = "GPLv2"
 
-from pathlib import Path
-from shutil import copy as shcopy
+import argparse
+import contextlib
+import errno
+import hashlib
+import os
 import re
+import shutil
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import List, Optional
+
+NAME_PATTERN = re.compile(r'^(\d{4})(\d{2})(\d{2})\d*_\d*')
+BUFFER_SIZE = 1 << 20
+
+
+@dataclass
+class Summary:
+    """Counters for one import run (updated from several threads)."""
+    copied: int = 0
+    linked: int = 0
+    skipped: int = 0
+    unmatched: int = 0
+    failed: int = 0
+    bytes_copied: int = 0
+    errors: List[str] = field(default_factory=list)
+    lock: Lock = field(default_factory=Lock, repr=False)
+
+    def add(self, **counts) -> None:
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+def target_dir(destination: Path, name: str) -> Optional[Path]:
+    """
+    Bestimmt das Zielverzeichnis (Jahr/Monat/Tag) aus dem Dateinamen.
+
+    >>> target_dir(Path("/dst"), "20240131_120000.jpg")
+    PosixPath('/dst/2024/01/31')
+    >>> target_dir(Path("/dst"), "IMG_0001.jpg") is None
+    True
+    """
+    match = NAME_PATTERN.search(name)
+    if not match:
+        return None
+    return destination.joinpath(*match.groups())
+
+
+def file_hash(path: Path) -> str:
+    """Berechnet den BLAKE2b-Hash einer Datei mit einem festen Puffer."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(BUFFER_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_unchanged(source: Path, target: Path, use_hash: bool = False) -> bool:
+    """
+    Prüft, ob target bereits eine Kopie von source ist: gleiche Größe und
+    Änderungszeit, oder (mit use_hash) gleicher Inhalt.
+    """
+    try:
+        dst = target.stat()
+    except FileNotFoundError:
+        return False
+    src = source.stat()
+    if src.st_size != dst.st_size:
+        return False
+    if use_hash:
+        return file_hash(source) == file_hash(target)
+    return src.st_mtime_ns == dst.st_mtime_ns
+
+
+class ImportIndex:
+    """
+    SQLite-Index der importierten Dateien. Speichert für jede gesehene
+    Quelldatei Größe, Änderungszeit und Hash (damit unveränderte Dateien
+    nicht erneut gelesen werden müssen) und für jeden importierten Inhalt
+    den absoluten Pfad im Ziel samt Größe und Änderungszeit, damit eine
+    seither veränderte Datei nicht mehr als Kopie dieses Inhalts gilt.
+    Darf von mehreren Threads verwendet werden; mit read_only werden keine
+    Einträge geschrieben (z.B. für --dry-run).
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     photo = Path(d) / "a.jpg"
+    ...     _ = photo.write_bytes(b"jpeg")
+    ...     index = ImportIndex(":memory:")
+    ...     index.add_imported("abc", photo)
+    ...     found = index.imported_path("abc") == photo
+    ...     _ = photo.write_bytes(b"edited")
+    ...     stale = index.imported_path("abc")
+    >>> found, stale
+    (True, None)
+    >>> index.imported_path("xyz") is None
+    True
+    """
+
+    COMMIT_EVERY = 100
+
+    def __init__(self, path, read_only: bool = False):
+        self.lock = Lock()
+        self.read_only = read_only
+        self.pending = 0
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT);
+            CREATE TABLE IF NOT EXISTS imported (
+                hash TEXT PRIMARY KEY, path TEXT, size INTEGER, mtime_ns INTEGER);
+        """)
+
+    def _write(self, sql: str, params: tuple) -> None:
+        if self.read_only:
+            return
+        with self.lock:
+            self.db.execute(sql, params)
+            self.pending += 1
+            if self.pending >= self.COMMIT_EVERY:
+                self.db.commit()
+                self.pending = 0
+
+    def source_hash(self, source: Path, st: os.stat_result) -> str:
+        """Liefert den Hash der Quelldatei, aus dem Index, falls unverändert."""
+        key = str(source.resolve())
+        with self.lock:
+            row = self.db.execute("SELECT size, mtime_ns, hash FROM sources WHERE path = ?", (key,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        digest = file_hash(source)
+        self._write("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                    (key, st.st_size, st.st_mtime_ns, digest))
+        return digest
+
+    def imported_path(self, digest: str) -> Optional[Path]:
+        """
+        Pfad, unter dem dieser Inhalt bereits importiert wurde, oder None,
+        falls es die Datei nicht mehr gibt oder sie seither verändert wurde.
+        """
+        with self.lock:
+            row = self.db.execute("SELECT path, size, mtime_ns FROM imported WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        path = Path(row[0])
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        if st.st_size != row[1] or st.st_mtime_ns != row[2]:
+            return None
+        return path
+
+    def add_imported(self, digest: str, target: Path) -> None:
+        st = target.stat()
+        self._write("INSERT OR REPLACE INTO imported VALUES (?, ?, ?, ?)",
+                    (digest, str(target.resolve()), st.st_size, st.st_mtime_ns))
+
+    def close(self) -> None:
+        with self.lock:
+            if not self.read_only:
+                self.db.commit()
+            self.db.close()
+
+
+def _copy_file_range(fin: int, fout: int, count: int) -> int:
+    return os.copy_file_range(fin, fout, count)
+
+
+def _sendfile(fin: int, fout: int, count: int) -> int:
+    return os.sendfile(fout, fin, None, count)
+
+
+KERNEL_COPIES = [copy for name, copy in (("copy_file_range", _copy_file_range), ("sendfile", _sendfile))
+                 if hasattr(os, name)]
+UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK}
+
+
+def fast_copy(source: Path, target: Path) -> int:
+    """
+    Kopiert eine Datei im Kernel (os.copy_file_range bzw. os.sendfile), wenn
+    das Dateisystem das unterstützt, sonst mit shutil.copyfileobj. Geschrieben
+    wird in eine .part-Datei, die erst am Ende umbenannt wird; Zeitstempel
+    werden übernommen, damit der nächste Lauf die Datei überspringen kann.
+
+    :return: Anzahl der kopierten Bytes
+    """
+    part = target.with_name(target.name + ".part")
+    size = source.stat().st_size
+    try:
+        with open(source, "rb") as fsrc, open(part, "wb") as fdst:
+            for copy in KERNEL_COPIES:
+                copied = 0
+                try:
+                    while copied < size:
+                        n = copy(fsrc.fileno(), fdst.fileno(), min(size - copied, 1 << 30))
+                        if n == 0:
+                            break
+                        copied += n
+                    break
+                except OSError as e:
+                    if copied or e.errno not in UNSUPPORTED:
+                        raise
+            else:
+                shutil.copyfileobj(fsrc, fdst, BUFFER_SIZE)
+                copied = fdst.tell()
+        if copied != size:
+            raise OSError(errno.EIO, f"nur {copied} von {size} Bytes kopiert", str(source))
+        shutil.copystat(source, part)
+        os.replace(part, target)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            part.unlink()
+        raise
+    return copied
+
+
+def link_or_copy(existing: Path, target: Path) -> int:
+    """
+    Legt target als Hardlink auf eine bereits importierte Datei an; geht das
+    nicht (anderes Dateisystem, keine Berechtigung), wird kopiert.
+
+    :return: Anzahl der kopierten Bytes (0 bei einem Hardlink)
+    """
+    part = target.with_name(target.name + ".part")
+    try:
+        if part.exists():
+            part.unlink()
+        os.link(existing, part)
+    except OSError:
+        return fast_copy(existing, target)
+    os.replace(part, target)
+    return 0
+
+
+def import_file(source: Path, destination: Path, summary: Summary, dry_run: bool = False,
+                use_hash: bool = False, verbose: bool = False, index: Optional[ImportIndex] = None) -> None:
+    """
+    Kopiert eine Datei in ihr Zielverzeichnis, falls sie sich geändert hat.
+    Mit einem Index wird ein bereits importierter Inhalt übersprungen bzw.
+    unter dem neuen Namen als Hardlink angelegt statt erneut kopiert.
+    """
+    directory = target_dir(destination, source.name)
+    if directory is None:
+        summary.add(unmatched=1)
+        return
+    target = directory / source.name
+    try:
+        existing = None
+        if index is not None:
+            digest = index.source_hash(source, source.stat())
+            existing = index.imported_path(digest)
+            if existing is not None and target.exists() and os.path.samefile(existing, target):
+                summary.add(skipped=1)
+                return
+        if existing is None and is_unchanged(source, target, use_hash):
+            if index is not None and not dry_run:
+                index.add_imported(digest, target)
+            summary.add(skipped=1)
+            return
+        if verbose:
+            print(f"{existing or source} -> {target}")
+        if dry_run:
+            if existing is None:
+                summary.add(copied=1, bytes_copied=source.stat().st_size)
+            else:
+                summary.add(linked=1)
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        if existing is None:
+            summary.add(copied=1, bytes_copied=fast_copy(source, target))
+        else:
+            copied = link_or_copy(existing, target)
+            summary.add(**({"copied": 1, "bytes_copied": copied} if copied else {"linked": 1}))
+        if index is not None:
+            index.add_imported(digest, target)
+    except OSError as e:
+        summary.add(failed=1)
+        with summary.lock:
+            summary.errors.append(f"{source}: {e}")
+
+
+def import_dcim(source: Path, destination: Path, pattern: str = "*.jpg", workers: int = 8,
+                dry_run: bool = False, use_hash: bool = False, verbose: bool = False,
+                index: Optional[ImportIndex] = None) -> Summary:
+    """
+    Kopiert alle Bilder aus source nach destination/Jahr/Monat/Tag mit einem
+    begrenzten Thread-Pool. Unveränderte Dateien werden übersprungen; jede
+    Datei, bei der ein Fehler auftritt, wird als fehlgeschlagen gezählt.
+    """
+    summary = Summary()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(import_file, file, destination, summary, dry_run, use_hash, verbose, index): file
+                   for file in source.glob(pattern)}
+        for future, file in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                # z.B. sqlite3.Error ("database is locked"), das kein OSError ist
+                summary.add(failed=1)
+                with summary.lock:
+                    summary.errors.append(f"{file}: {e}")
+    return summary
 
-source_path = Path(input("Pleae enter the source directory: "))
-destination_path = Path(input("Pleae enter the destination directory: "))
 
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Kopiert Fotos nach Jahr/Monat/Tag")
+    parser.add_argument("source", type=Path, help="Quellverzeichnis (z.B. DCIM der Kamera)")
+    parser.add_argument("destination", type=Path, help="Zielverzeichnis")
+    parser.add_argument("-p", "--pattern", default="*.jpg", help="Dateimuster (default = *.jpg)")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Anzahl paralleler Kopien")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Nur anzeigen, nichts kopieren")
+    parser.add_argument("--hash", action="store_true", help="Inhalt statt Größe+Änderungszeit vergleichen")
+    parser.add_argument("-i", "--index", type=Path,
+                        help="SQLite-Index der importierten Inhalte (default = Ziel/.dcim-index.sqlite)")
+    parser.add_argument("--no-index", action="store_true", help="Ohne Index, nur Größe+Änderungszeit vergleichen")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Jede kopierte Datei ausgeben")
+    return parser.parse_args()
 
-for file in sorted(source_path.glob("*.jpg")):
-    name = file.name
-    year = name[:4]
-    month = name[4:6]
-    day = name[6:8]
 
-    if re.compile(r'^\d*_\d*').search(name):
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.source.is_dir():
+        print(f"{args.source}: No such directory", file=sys.stderr)
+        sys.exit(1)
 
-        full_path = Path.joinpath(destination_path, year, month, day)
+    index = None
+    if not args.no_index:
+        index_path = args.index or args.destination / ".dcim-index.sqlite"
+        if not args.dry_run:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            index = ImportIndex(index_path)
+        elif index_path.exists():
+            index = ImportIndex(index_path, read_only=True)
 
-        if not full_path.exists():
-            full_path.mkdir(parents=True)
+    t0 = perf_counter()
+    try:
+        summary = import_dcim(args.source, args.destination, args.pattern, args.jobs,
+                              args.dry_run, args.hash, args.verbose, index)
+    finally:
+        if index is not None:
+            index.close()
+    seconds = perf_counter() - t0
 
-    shcopy(file, full_path)
+    for error in summary.errors:
+        print(error, file=sys.stderr)
+    mb = summary.bytes_copied / 1e6
+    action = "Zu kopieren" if args.dry_run else "Kopiert"
+    print(f"{action}: {summary.copied} ({mb:.1f} MB), verlinkt: {summary.linked}, übersprungen: {summary.skipped}, "
+          f"ohne Datum im Namen: {summary.unmatched}, Fehler: {summary.failed}")
+    print(f"Dauer: {seconds:.2f} s, {mb / seconds if seconds else 0:.1f} MB/s")
+    sys.exit(1 if summary.failed else 0)
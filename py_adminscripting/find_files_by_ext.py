@@ -3,13 +3,276 @@ __author__ = "Felix Friesenbichler"
 __email__ = "1127@htl.rennweg.at"
 __license__ = "GPLv2"
 
-from pathlib import Path
+import argparse
+import os
+import sqlite3
+import sys
 from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from time import perf_counter
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
 
-path = Path(input("Enter an absolute path: "))
-ext = input("Enter a file extension: ")
 
-print(Counter(pathd.suffix for pathd in Path.cwd().iterdir()))
+def normalize_extensions(extensions: Iterable[str], ignore_case: bool = False) -> frozenset:
+    """
+    Bringt Dateierweiterungen in die Form von Path.suffix (mit Punkt).
 
-for file in sorted(path.rglob(f"*.{ext}")):
-    print(file.absolute().resolve())
+    >>> sorted(normalize_extensions(["jpg", ".PNG"], ignore_case=True))
+    ['.jpg', '.png']
+    """
+    result = set()
+    for ext in extensions:
+        ext = ext if ext.startswith(".") else "." + ext
+        result.add(ext.lower() if ignore_case else ext)
+    return frozenset(result)
+
+
+def scan_directory(path: str) -> Tuple[List[str], List[str], Optional[str]]:
+    """
+    Liest ein Verzeichnis mit os.scandir. Symbolische Links auf Verzeichnisse
+    werden nicht verfolgt.
+
+    :return: Dateien, Unterverzeichnisse und ggf. eine Fehlermeldung
+    """
+    files = []
+    dirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    else:
+                        files.append(entry.path)
+                except OSError:
+                    files.append(entry.path)
+    except OSError as e:
+        return files, dirs, f"{path}: {e.strerror}"
+    return files, dirs, None
+
+
+def walk_parallel(root: str, workers: int = 16) -> Iterator[str]:
+    """
+    Liefert alle Dateien unterhalb von root, sobald sie gefunden werden.
+    Die Verzeichnisse werden von einem Thread-Pool gelesen; Fehler (z.B.
+    fehlende Berechtigungen) werden auf stderr ausgegeben.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan_directory, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs, error = future.result()
+                if error:
+                    print(error, file=sys.stderr)
+                pending.update(pool.submit(scan_directory, d) for d in dirs)
+                yield from files
+
+
+def find_files(root: str, extensions: Iterable[str], workers: int = 16, ignore_case: bool = False,
+               histogram: Optional[Counter] = None) -> Iterator[str]:
+    """
+    Sucht in einem Durchlauf nach Dateien mit einer der angegebenen
+    Erweiterungen. Ist histogram angegeben, werden dort die Erweiterungen
+    aller Dateien des Baums gezählt.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     for name in ("a.txt", "b.JPG", "sub/c.jpg", "sub/deeper/d.py"):
+    ...         os.makedirs(os.path.dirname(os.path.join(d, name)), exist_ok=True)
+    ...         open(os.path.join(d, name), "w").close()
+    ...     hist = Counter()
+    ...     found = sorted(os.path.relpath(p, d) for p in find_files(d, ["jpg"], 4, True, hist))
+    >>> found
+    ['b.JPG', 'sub/c.jpg']
+    >>> sorted(hist.items())
+    [('.jpg', 2), ('.py', 1), ('.txt', 1)]
+    """
+    wanted = normalize_extensions(extensions, ignore_case)
+    for path in walk_parallel(root, workers):
+        ext = os.path.splitext(os.path.basename(path))[1]
+        if ignore_case:
+            ext = ext.lower()
+        if histogram is not None:
+            histogram[ext] += 1
+        if ext in wanted:
+            yield path
+
+
+def check_directory(path: str, known_mtime: Optional[int]):
+    """
+    Liest ein Verzeichnis nur dann neu ein, wenn sich seine Änderungszeit
+    seit dem letzten Lauf geändert hat.
+
+    :return: Pfad, aktuelle Änderungszeit (None, wenn es nicht mehr existiert)
+             und das Ergebnis von scan_directory (None, wenn unverändert)
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return path, None, None
+    if mtime == known_mtime:
+        return path, mtime, None
+    return path, mtime, scan_directory(path)
+
+
+class ExtensionIndex:
+    """
+    Persistenter SQLite-Index der Dateien eines Verzeichnisbaums nach
+    Erweiterung. refresh() liest nur Verzeichnisse neu ein, deren
+    Änderungszeit sich seit dem letzten Lauf geändert hat (neue, gelöschte
+    oder umbenannte Einträge); alle anderen werden nur mit stat geprüft.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     for name in ("a.txt", "sub/b.JPG", "sub/deeper/c.jpg"):
+    ...         os.makedirs(os.path.dirname(os.path.join(d, name)), exist_ok=True)
+    ...         open(os.path.join(d, name), "w").close()
+    ...     index = ExtensionIndex(":memory:")
+    ...     first = index.refresh(d)
+    ...     second = index.refresh(d)
+    ...     open(os.path.join(d, "sub", "deeper", "e.jpg"), "w").close()
+    ...     third = index.refresh(d)
+    ...     found = sorted(os.path.relpath(p, d) for p in index.query(["jpg"], ignore_case=True))
+    ...     exact = sorted(os.path.relpath(p, d) for p in index.query(["jpg"]))
+    >>> first, second, third
+    ((3, 3), (3, 0), (3, 1))
+    >>> found
+    ['sub/b.JPG', 'sub/deeper/c.jpg', 'sub/deeper/e.jpg']
+    >>> exact
+    ['sub/deeper/c.jpg', 'sub/deeper/e.jpg']
+    >>> sorted(index.histogram(ignore_case=True).items())
+    [('.jpg', 3), ('.txt', 1)]
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(str(path))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER);
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+            CREATE TABLE IF NOT EXISTS files (dir TEXT, name TEXT, ext TEXT COLLATE NOCASE,
+                                              PRIMARY KEY (dir, name));
+            CREATE INDEX IF NOT EXISTS files_ext ON files (ext);
+        """)
+
+    def _set_root(self, root: str) -> None:
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        if row and row[0] != root:
+            self.db.executescript("DELETE FROM dirs; DELETE FROM files;")
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (root,))
+
+    def _mtime(self, path: str) -> Optional[int]:
+        row = self.db.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def _children(self, path: str) -> Set[str]:
+        return {row[0] for row in self.db.execute("SELECT path FROM dirs WHERE parent = ?", (path,))}
+
+    def _forget(self, path: str) -> None:
+        """Entfernt ein Verzeichnis samt Unterbaum aus dem Index."""
+        # Alle Pfade unterhalb von path liegen zwischen path + "/" und path + "0".
+        low, high = path + os.sep, path + chr(ord(os.sep) + 1)
+        self.db.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+        self.db.execute("DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (path, low, high))
+
+    def _store(self, path: str, parent: Optional[str], mtime: Optional[int],
+               files: List[str], subdirs: List[str]) -> None:
+        self.db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (path, parent, mtime))
+        self.db.execute("DELETE FROM files WHERE dir = ?", (path,))
+        self.db.executemany("INSERT INTO files VALUES (?, ?, ?)",
+                            ((path, name, os.path.splitext(name)[1])
+                             for name in map(os.path.basename, files)))
+        for removed in self._children(path) - set(subdirs):
+            self._forget(removed)
+        self.db.executemany("INSERT OR IGNORE INTO dirs VALUES (?, ?, NULL)", ((d, path) for d in subdirs))
+
+    def refresh(self, root: str, workers: int = 16) -> Tuple[int, int]:
+        """
+        Bringt den Index für root auf den aktuellen Stand.
+
+        :return: Anzahl der geprüften und der neu eingelesenen Verzeichnisse
+        """
+        root = os.path.abspath(root)
+        self._set_root(root)
+        checked = rescanned = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(check_directory, root, self._mtime(root))}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, mtime, listing = future.result()
+                    checked += 1
+                    if mtime is None:
+                        self._forget(path)
+                        continue
+                    if listing is None:
+                        subdirs = self._children(path)
+                    else:
+                        rescanned += 1
+                        files, subdirs, error = listing
+                        if error:
+                            print(error, file=sys.stderr)
+                            mtime = None
+                        parent = None if path == root else os.path.dirname(path)
+                        self._store(path, parent, mtime, files, subdirs)
+                    pending.update(pool.submit(check_directory, d, self._mtime(d)) for d in subdirs)
+        self.db.commit()
+        return checked, rescanned
+
+    def query(self, extensions: Iterable[str], ignore_case: bool = False) -> Iterator[str]:
+        """Liefert alle Dateien des Index mit einer der Erweiterungen."""
+        wanted = normalize_extensions(extensions, ignore_case)
+        marks = ", ".join("?" * len(wanted))
+        rows = self.db.execute(f"SELECT dir, name, ext FROM files WHERE ext IN ({marks})", tuple(wanted))
+        for directory, name, ext in rows:
+            if ignore_case or ext in wanted:
+                yield os.path.join(directory, name)
+
+    def histogram(self, ignore_case: bool = False) -> Counter:
+        """Zählt die Dateien im Index nach Erweiterung."""
+        group = "lower(ext)" if ignore_case else "ext COLLATE BINARY"
+        return Counter(dict(self.db.execute(f"SELECT {group}, count(*) FROM files GROUP BY {group}")))
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Sucht Dateien nach Erweiterung")
+    parser.add_argument("path", help="Startverzeichnis")
+    parser.add_argument("ext", nargs="+", help="Eine oder mehrere Dateierweiterungen, z.B. jpg png")
+    parser.add_argument("-j", "--jobs", type=int, default=16, help="Anzahl der Verzeichnis-Threads")
+    parser.add_argument("-i", "--ignore-case", action="store_true", help="Groß-/Kleinschreibung ignorieren")
+    parser.add_argument("-t", "--top", type=int, default=20, help="Anzahl der Erweiterungen im Histogramm")
+    parser.add_argument("-x", "--index", help="SQLite-Index verwenden (wird inkrementell aktualisiert)")
+    parser.add_argument("--no-refresh", action="store_true", help="Index nicht aktualisieren, nur abfragen")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Nur das Histogramm ausgeben")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.index:
+        index = ExtensionIndex(args.index)
+        if not args.no_refresh:
+            t0 = perf_counter()
+            checked, rescanned = index.refresh(args.path, args.jobs)
+            print(f"Index: {checked} Verzeichnisse geprüft, {rescanned} neu eingelesen "
+                  f"({perf_counter() - t0:.2f} s)", file=sys.stderr)
+        results = index.query(args.ext, args.ignore_case)
+        histogram = index.histogram(args.ignore_case)
+    else:
+        histogram = Counter()
+        results = find_files(args.path, args.ext, args.jobs, args.ignore_case, histogram)
+
+    found = 0
+    for file in results:
+        found += 1
+        if not args.quiet:
+            print(file)
+
+    print(f"\n{found} von {sum(histogram.values())} Dateien gefunden", file=sys.stderr)
+    for ext, count in histogram.most_common(args.top):
+        print(f"{ext or '(ohne)':<12} {count:>10}", file=sys.stderr)
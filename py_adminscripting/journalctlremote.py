@@ -26,31 +26,418 @@ __license__ = "GPLv2"
 # -) Warum gilt die Authentifizuerung mittels Schlüsselpaar als sicherer, als ein Login mittels herkömmlicher Passwörter?
 # -> Ein Schlüsselpaar wird schwerer gebrochen.
 
-import paramiko
-import getpass
+import argparse
+import gzip
+import json
+import os
+import shlex
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import BoundedSemaphore, Lock
+from typing import Callable, Dict, Iterable, Iterator, Optional
 
-def fetch_journal_logs(remote_host: str, username: str, key_file: str, minutes: int) -> None:
-    command = f'journalctl --since "-{minutes} minutes"'
 
-    try:
+def journal_command(minutes: int) -> str:
+    """
+    >>> journal_command(15)
+    'journalctl --no-pager --since "-15 minutes"'
+    """
+    return f'journalctl --no-pager --since "-{minutes} minutes"'
+
+
+def cursor_command(cursor: Optional[str], minutes: int = 60) -> str:
+    """
+    Befehl für eine inkrementelle Abfrage im JSON-Format: ab dem letzten
+    Cursor, beim ersten Mal die letzten minutes Minuten.
+
+    >>> cursor_command("s=1;i=2")
+    "journalctl --no-pager -o json --after-cursor 's=1;i=2'"
+    >>> cursor_command(None, 5)
+    'journalctl --no-pager -o json --since "-5 minutes"'
+    """
+    if cursor:
+        return f"journalctl --no-pager -o json --after-cursor {shlex.quote(cursor)}"
+    return f'journalctl --no-pager -o json --since "-{minutes} minutes"'
+
+
+def _exit_error(command: str, host: str, status: int, stderr: str) -> str:
+    message = f"{command!r} auf {host}: Exit-Status {status}"
+    stderr = stderr.strip()
+    return f"{message}: {stderr}" if stderr else message
+
+
+class SSHTransport:
+    """
+    Persistente SSH-Verbindung zu einem Host (paramiko). Die Verbindung wird
+    beim ersten Befehl aufgebaut und für alle weiteren Befehle verwendet.
+    """
+
+    def __init__(self, host: str, username: Optional[str] = None, key_file: Optional[str] = None):
+        if "@" in host:
+            username, host = host.split("@", 1)
+        self.host = host
+        self.username = username
+        self.key_file = key_file
+        self.client = None
+
+    def _connect(self):
+        import paramiko
+
         client = paramiko.SSHClient()
         client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        client.connect(remote_host, username=username, key_filename=key_file)
+        client.connect(self.host, username=self.username, key_filename=self.key_file)
+        return client
+
+    def stream(self, command: str) -> Iterator[str]:
+        """Führt command aus und liefert die Ausgabe Zeile für Zeile."""
+        if self.client is None:
+            self.client = self._connect()
+        stdin, stdout, stderr = self.client.exec_command(command)
+        stdin.close()
+        yield from stdout
+        status = stdout.channel.recv_exit_status()
+        if status != 0:
+            raise RuntimeError(_exit_error(command, self.host, status, stderr.read().decode()))
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+class LocalTransport:
+    """
+    Ersatz für SSHTransport, der Befehle lokal per subprocess ausführt, z.B.
+    zum Testen oder für den eigenen Rechner.
+
+    >>> list(LocalTransport("localhost").stream("printf 'a\\nb\\n'"))
+    ['a\\n', 'b\\n']
+    >>> list(LocalTransport("localhost").stream("exit 3"))
+    Traceback (most recent call last):
+        ...
+    RuntimeError: 'exit 3' auf localhost: Exit-Status 3
+    >>> list(LocalTransport("localhost").stream("echo kaputt >&2; exit 1"))
+    Traceback (most recent call last):
+        ...
+    RuntimeError: 'echo kaputt >&2; exit 1' auf localhost: Exit-Status 1: kaputt
+    """
+
+    def __init__(self, host: str, *args, **kwargs):
+        self.host = host
+
+    def stream(self, command: str) -> Iterator[str]:
+        """Führt command aus und liefert die Ausgabe Zeile für Zeile."""
+        with tempfile.TemporaryFile("w+") as err:
+            with subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=err,
+                                  stdin=subprocess.DEVNULL, text=True) as proc:
+                yield from proc.stdout
+            if proc.returncode != 0:
+                err.seek(0)
+                raise RuntimeError(_exit_error(command, self.host, proc.returncode, err.read()))
+
+    def close(self) -> None:
+        pass
+
+
+class ConnectionPool:
+    """
+    Hält offene Verbindungen pro Host, damit sie über mehrere Abfragen
+    wiederverwendet werden. Pro Host sind höchstens max_per_host
+    Verbindungen gleichzeitig in Verwendung.
+
+    >>> pool = ConnectionPool(LocalTransport)
+    >>> for _ in range(3):
+    ...     with pool.connection("a") as conn:
+    ...         _ = list(conn.stream("true"))
+    >>> pool.created
+    1
+    """
+
+    def __init__(self, factory: Callable[[str], object], max_per_host: int = 1):
+        self.factory = factory
+        self.max_per_host = max_per_host
+        self.created = 0
+        self.lock = Lock()
+        self.idle = defaultdict(list)
+        self.limits = {}
+
+    @contextmanager
+    def connection(self, host: str):
+        with self.lock:
+            limit = self.limits.setdefault(host, BoundedSemaphore(self.max_per_host))
+        with limit:
+            with self.lock:
+                conn = self.idle[host].pop() if self.idle[host] else None
+            if conn is None:
+                conn = self.factory(host)
+                with self.lock:
+                    self.created += 1
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            with self.lock:
+                self.idle[host].append(conn)
+
+    def close(self) -> None:
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+            self.idle.clear()
+
+
+def collect_host(pool: ConnectionPool, host: str, command: str, out_dir: Path) -> int:
+    """
+    Schreibt die Ausgabe von command auf host zeilenweise nach out_dir/host.log.
+
+    :return: Anzahl der geschriebenen Zeilen
+    """
+    lines = 0
+    with pool.connection(host) as conn, open(out_dir / f"{host}.log", "w", encoding="utf-8") as f:
+        for line in conn.stream(command):
+            f.write(line)
+            lines += 1
+    return lines
 
-        stdin, stdout, stderr = client.exec_command(command)
-        print(stdout.read().decode())
 
-        client.close()
+def collect_journals(hosts: Iterable[str], command: str, out_dir: Path, pool: ConnectionPool,
+                     workers: int = 8) -> Dict[str, object]:
+    """
+    Holt die Ausgabe von command von allen Hosts gleichzeitig.
+
+    :return: Dictionary Host -> Anzahl der Zeilen oder die Exception
+
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     result = collect_journals(["a", "b"], "printf 'x\\ny\\n'", Path(d), ConnectionPool(LocalTransport))
+    ...     content = (Path(d) / "b.log").read_text()
+    >>> result, content
+    ({'a': 2, 'b': 2}, 'x\\ny\\n')
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {host: executor.submit(collect_host, pool, host, command, out_dir) for host in hosts}
+    result = {}
+    for host, future in futures.items():
+        try:
+            result[host] = future.result()
+        except Exception as e:
+            result[host] = e
+    return result
+
+
+def _day(timestamp_us: int) -> str:
+    """
+    >>> _day(1700000000 * 10 ** 6)
+    '2023-11-14'
+    """
+    return datetime.fromtimestamp(timestamp_us / 1e6, timezone.utc).date().isoformat()
+
+
+class JournalStore:
+    """
+    Lokale Ablage der Journal-Einträge: pro Host, Tag (UTC) und Lauf eine
+    gzip-komprimierte JSON-Lines-Datei, pro Host der zuletzt gespeicherte
+    Cursor und ein SQLite-Index mit dem Zeitbereich jeder Datei, damit für
+    eine Zeitraum-Abfrage nur die passenden Dateien gelesen werden.
+
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     store = JournalStore(Path(d))
+    ...     lines = [json.dumps({"__CURSOR": f"c{i}", "__REALTIME_TIMESTAMP": str(t), "MESSAGE": f"m{i}"}) + "\\n"
+    ...              for i, t in enumerate((1700000000000000, 1700000001000000, 1700090000000000))]
+    ...     added = store.append("web1", iter(lines))
+    ...     cursor = store.cursor("web1")
+    ...     files = sorted(p.name for p in (Path(d) / "web1").glob("*.gz"))
+    ...     found = [e["MESSAGE"] for e in store.query("web1", 1700000000500000, 1700100000000000)]
+    ...     store.close()
+    >>> added, cursor, found
+    (3, 'c2', ['m1', 'm2'])
+    >>> files
+    ['2023-11-14.1700000000000000.jsonl.gz', '2023-11-15.1700090000000000.jsonl.gz']
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lock = Lock()
+        self.db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                host TEXT, file TEXT, first_us INTEGER, last_us INTEGER, entries INTEGER,
+                PRIMARY KEY (host, file))
+        """)
+
+    def cursor(self, host: str) -> Optional[str]:
+        """Der Cursor des zuletzt gespeicherten Eintrags dieses Hosts."""
+        try:
+            return (self.root / host / "cursor").read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _save_cursor(self, host: str, cursor: str) -> None:
+        path = self.root / host / "cursor"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(cursor, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _add_chunk(self, host: str, file: str, first: int, last: int, entries: int) -> None:
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)",
+                            (host, file, first, last, entries))
+            self.db.commit()
+
+    def append(self, host: str, lines: Iterable[str]) -> int:
+        """
+        Liest JSON-Zeilen (journalctl -o json), sobald sie ankommen, und
+        schreibt sie in neue Dateien dieses Laufs (eine pro Tag). Die Dateien
+        werden zuerst als .part geschrieben und erst nach dem Schließen
+        umbenannt; danach wird der Cursor gespeichert. Bricht der Datenstrom
+        mit einer Exception ab, wird das bis dahin Gelesene so übernommen;
+        wird der Prozess beendet, bleiben nur .part-Dateien übrig, die der
+        nächste Lauf löscht, bevor er die Einträge erneut holt.
+
+        :return: Anzahl der gespeicherten Einträge
+        """
+        host_dir = self.root / host
+        host_dir.mkdir(exist_ok=True)
+        for stale in host_dir.glob("*.part"):
+            stale.unlink()
+        chunks = {}
+        total = 0
+        cursor = None
+        try:
+            for line in lines:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                ts = int(entry["__REALTIME_TIMESTAMP"])
+                day = _day(ts)
+                chunk = chunks.get(day)
+                if chunk is None:
+                    # Der erste Zeitstempel macht den Namen pro Lauf eindeutig.
+                    name = f"{day}.{ts}.jsonl.gz"
+                    out = gzip.open(host_dir / f"{name}.part", "wt", encoding="utf-8")
+                    chunk = chunks[day] = [out, name, ts, ts, 0]
+                chunk[0].write(line if line.endswith("\n") else line + "\n")
+                chunk[2], chunk[3] = min(chunk[2], ts), max(chunk[3], ts)
+                chunk[4] += 1
+                total += 1
+                cursor = entry["__CURSOR"]
+        finally:
+            for out, name, first, last, count in chunks.values():
+                out.close()
+                os.replace(host_dir / f"{name}.part", host_dir / name)
+                self._add_chunk(host, name, first, last, count)
+            if cursor is not None:
+                self._save_cursor(host, cursor)
+        return total
+
+    def query(self, host: str, start_us: int, end_us: int) -> Iterator[dict]:
+        """Liefert alle gespeicherten Einträge eines Hosts mit start_us <= Zeit <= end_us."""
+        with self.lock:
+            files = [row[0] for row in self.db.execute(
+                "SELECT file FROM chunks WHERE host = ? AND last_us >= ? AND first_us <= ? ORDER BY first_us",
+                (host, start_us, end_us))]
+        for file in files:
+            with gzip.open(self.root / host / file, "rt", encoding="utf-8") as f:
+                try:
+                    for line in f:
+                        entry = json.loads(line)
+                        if start_us <= int(entry["__REALTIME_TIMESTAMP"]) <= end_us:
+                            yield entry
+                except (EOFError, gzip.BadGzipFile, json.JSONDecodeError):
+                    # Abgeschnittene Datei (z.B. voller Datenträger): der Rest fehlt.
+                    print(f"{host}/{file}: Datei unvollständig", file=sys.stderr)
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+
+def collect_incremental(hosts: Iterable[str], store: JournalStore, pool: ConnectionPool, workers: int = 8,
+                        minutes: int = 60, make_command: Callable[[Optional[str], int], str] = cursor_command
+                        ) -> Dict[str, object]:
+    """
+    Holt von allen Hosts gleichzeitig nur die Einträge nach dem gespeicherten
+    Cursor und legt sie im store ab.
+
+    :return: Dictionary Host -> Anzahl der neuen Einträge oder die Exception
+    """
+    def collect(host):
+        command = make_command(store.cursor(host), minutes)
+        with pool.connection(host) as conn:
+            return store.append(host, conn.stream(command))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {host: executor.submit(collect, host) for host in hosts}
+    result = {}
+    for host, future in futures.items():
+        try:
+            result[host] = future.result()
+        except Exception as e:
+            result[host] = e
+    return result
+
+
+def fetch_journal_logs(remote_host: str, username: str, key_file: str, minutes: int) -> None:
+    try:
+        transport = SSHTransport(remote_host, username, key_file)
+        try:
+            for line in transport.stream(journal_command(minutes)):
+                print(line, end="")
+        finally:
+            transport.close()
     except Exception as e:
         print(f"Fehler bei der Verbindung: {e}")
 
-if __name__ == "__main__":
-    remote_host = "192.168.1.100"  # Hier die Server-IP hardcoden
-    username = "junioradmin"
-    key_file = getpass.getpass("Pfad zum privaten SSH-Schlüssel: ")
 
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Holt die Journale mehrerer Hosts über SSH")
+    parser.add_argument("hosts", nargs="+", help="Hosts, optional als user@host")
+    parser.add_argument("-u", "--username", default="junioradmin", help="SSH-Benutzer (default = junioradmin)")
+    parser.add_argument("-k", "--key-file", help="Privater SSH-Schlüssel")
+    parser.add_argument("-m", "--minutes", type=int, default=60, help="Zeitraum in Minuten (default = 60)")
+    parser.add_argument("-o", "--out-dir", type=Path, default=Path("journals"), help="Zielverzeichnis")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Anzahl gleichzeitiger Hosts")
+    parser.add_argument("-s", "--store", type=Path,
+                        help="Inkrementell (ab dem letzten Cursor) in diese Ablage sammeln")
+    parser.add_argument("--local", action="store_true", help="Befehle lokal statt über SSH ausführen")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.local:
+        factory = LocalTransport
+    else:
+        factory = lambda host: SSHTransport(host, args.username, args.key_file)
+    pool = ConnectionPool(factory)
+    store = JournalStore(args.store) if args.store else None
     try:
-        minutes = int(input("Geben Sie die Anzahl der Minuten ein: "))
-        fetch_journal_logs(remote_host, username, key_file, minutes)
-    except ValueError:
-        print("Ungültige Eingabe. Bitte eine Zahl eingeben.")
+        if store is not None:
+            result = collect_incremental(args.hosts, store, pool, args.jobs, args.minutes)
+        else:
+            result = collect_journals(args.hosts, journal_command(args.minutes), args.out_dir, pool, args.jobs)
+    finally:
+        pool.close()
+        if store is not None:
+            store.close()
+
+    failed = 0
+    for host, lines in result.items():
+        if isinstance(lines, Exception):
+            failed += 1
+            print(f"{host}: Fehler: {lines}", file=sys.stderr)
+        else:
+            target = args.store / host if store is not None else args.out_dir / (host + ".log")
+            print(f"{host}: {lines} Zeilen -> {target}")
+    sys.exit(1 if failed else 0)
@@ -3,8 +3,24 @@ __author__ = "Felix Friesenbichler"
 __email__ = "1127@htl.rennweg.at"
 __license__ = "GPLv2"
 
+import argparse
+import asyncio
+import errno
 import ipaddress
+import math
+import os
+import re
+import select
+import shutil
+import socket
+import struct
 import subprocess
+import sys
+from time import perf_counter
+from typing import Dict, List, Optional
+
+RTT_PATTERN = re.compile(r"time[=<]([\d.]+) ms")
+
 
 def ping_subnet(network_address: str) -> None:
     try:
@@ -15,6 +31,223 @@ def ping_subnet(network_address: str) -> None:
     except ValueError as e:
         print(f'Ungültige Netzwerkadresse: {e}')
 
+
+def parse_rtt(output: str) -> Optional[float]:
+    """
+    Liest die Antwortzeit (ms) aus der Ausgabe von ping.
+
+    >>> parse_rtt("64 bytes from 127.0.0.1: icmp_seq=1 ttl=64 time=0.045 ms")
+    0.045
+    >>> parse_rtt("1 packets transmitted, 0 received") is None
+    True
+    """
+    match = RTT_PATTERN.search(output)
+    return float(match.group(1)) if match else None
+
+
+async def _ping_host(host: str, timeout: float, limit: asyncio.Semaphore) -> Optional[float]:
+    async with limit:
+        proc = await asyncio.create_subprocess_exec(
+            "ping", "-c", "1", "-n", "-W", str(max(1, math.ceil(timeout))), host,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        try:
+            out, _ = await proc.communicate()
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+    if proc.returncode != 0:
+        return None
+    return parse_rtt(out.decode(errors="replace"))
+
+
+async def ping_sweep(hosts: List[str], concurrency: int = 256, timeout: float = 1.0,
+                     deadline: float = 60.0) -> Dict[str, Optional[float]]:
+    """
+    Pingt die Hosts gleichzeitig mit höchstens concurrency ping-Prozessen.
+    Hosts, die bis zur deadline (Sekunden) nicht fertig sind, fehlen im
+    Ergebnis.
+
+    :return: Dictionary Host -> Antwortzeit in ms, None wenn keine Antwort
+    :raises FileNotFoundError: Wenn es kein ping-Programm gibt
+    """
+    if shutil.which("ping") is None:
+        raise FileNotFoundError("ping wurde nicht gefunden (Paket iputils-ping installieren oder -m icmp verwenden)")
+    limit = asyncio.Semaphore(concurrency)
+    tasks = {asyncio.ensure_future(_ping_host(host, timeout, limit)): host for host in hosts}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    # Fehler beim Starten von ping (z.B. zu viele offene Dateien) brechen den
+    # Lauf ab, statt den Host fälschlich als nicht erreichbar zu melden.
+    return {tasks[task]: task.result() for task in done}
+
+
+def _checksum(data: bytes) -> int:
+    """
+    Internet-Prüfsumme (RFC 1071).
+
+    >>> hex(_checksum(bytes.fromhex("0800000012340001")))
+    '0xe5ca'
+    """
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(ident: int, seq: int) -> bytes:
+    header = struct.pack("!BBHHH", 8, 0, 0, ident, seq)
+    payload = b"pinglawine"
+    return struct.pack("!BBHHH", 8, 0, _checksum(header + payload), ident, seq) + payload
+
+
+def open_icmp_socket():
+    """
+    Öffnet einen ICMP-Socket: raw (root bzw. CAP_NET_RAW) oder einen
+    unprivilegierten Ping-Socket (net.ipv4.ping_group_range).
+
+    :return: Socket und ob es ein Raw-Socket ist, oder (None, False)
+    """
+    for kind in (socket.SOCK_RAW, socket.SOCK_DGRAM):
+        try:
+            return socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP), kind == socket.SOCK_RAW
+        except PermissionError:
+            continue
+    return None, False
+
+
+def icmp_sweep(sock: socket.socket, raw: bool, hosts: List[str], timeout: float = 1.0,
+               deadline: float = 60.0) -> Dict[str, Optional[float]]:
+    """
+    Schickt allen Hosts über einen einzigen Socket einen Echo-Request und
+    sammelt die Antworten ein, während noch gesendet wird. Hosts, an die
+    bis zur deadline nicht gesendet wurde, fehlen im Ergebnis.
+
+    :return: Dictionary Host -> Antwortzeit in ms, None wenn keine Antwort
+    """
+    start = perf_counter()
+    end = start + deadline
+    ident = os.getpid() & 0xFFFF
+    sent = {}
+    replies = {}
+    sock.setblocking(False)
+    try:
+        # Jede Antwort (und bei Raw-Sockets auf loopback auch jede Anfrage) landet
+        # im Empfangspuffer; der Standardwert reicht nur für wenige hundert Pakete.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    except OSError:
+        pass
+
+    def drain(wait: float) -> None:
+        while select.select([sock], [], [], max(0.0, wait))[0]:
+            wait = 0
+            try:
+                data, (addr, _) = sock.recvfrom(2048)
+            except BlockingIOError:
+                return
+            now = perf_counter()
+            if raw:
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            kind, _, _, reply_id, _ = struct.unpack("!BBHHH", data[:8])
+            if kind == 0 and (reply_id == ident or not raw) and addr in sent and addr not in replies:
+                replies[addr] = round((now - sent[addr]) * 1000, 3)
+
+    for seq, host in enumerate(hosts):
+        if perf_counter() > end:
+            break
+        packet = _echo_request(ident, seq & 0xFFFF)
+        while True:
+            try:
+                sock.sendto(packet, (host, 0))
+                sent[host] = perf_counter()
+                break
+            except (BlockingIOError, InterruptedError):
+                drain(0.01)
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    sent[host] = None
+                    break
+                drain(0.01)
+        if seq % 32 == 31:
+            drain(0)
+
+    stop = min(perf_counter() + timeout, end)
+    while perf_counter() < stop and len(replies) < len(sent):
+        drain(stop - perf_counter())
+    return {host: replies.get(host) for host in sent}
+
+
+def sweep(network_address: str, method: str = "auto", concurrency: int = 256, timeout: float = 1.0,
+          deadline: float = 60.0) -> Dict[str, Optional[float]]:
+    """
+    Prüft alle Hosts eines Netzes: mit einem ICMP-Socket, falls erlaubt,
+    sonst mit parallel gestarteten ping-Prozessen (ping -c 1 -W).
+    """
+    network = ipaddress.ip_network(network_address, strict=False)
+    hosts = [str(host) for host in network.hosts()]
+    if method in ("auto", "icmp"):
+        sock, raw = open_icmp_socket()
+        if sock is not None:
+            with sock:
+                return icmp_sweep(sock, raw, hosts, timeout, deadline)
+        if method == "icmp":
+            raise PermissionError("Kein ICMP-Socket erlaubt (root, CAP_NET_RAW oder ping_group_range nötig)")
+    return asyncio.run(ping_sweep(hosts, concurrency, timeout, deadline))
+
+
+def format_table(results: Dict[str, Optional[float]], show_all: bool = False) -> str:
+    """
+    >>> print(format_table({"10.0.0.2": None, "10.0.0.1": 0.5}, show_all=True))
+    Host             Status       RTT
+    10.0.0.1         up      0.500 ms
+    10.0.0.2         down           -
+    """
+    lines = [f"{'Host':<16} {'Status':<6} {'RTT':>9}"]
+    for host in sorted(results, key=ipaddress.ip_address):
+        rtt = results[host]
+        if rtt is not None:
+            lines.append(f"{host:<16} {'up':<6} {rtt:>6.3f} ms")
+        elif show_all:
+            lines.append(f"{host:<16} {'down':<6} {'-':>9}")
+    return "\n".join(lines)
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Pingt alle Hosts eines Netzes")
+    parser.add_argument("network", help="Netz mit Suffix, z.B. 192.168.1.0/24")
+    parser.add_argument("-m", "--method", choices=("auto", "icmp", "ping"), default="auto",
+                        help="ICMP-Socket oder ping-Prozesse (default = auto)")
+    parser.add_argument("-c", "--concurrency", type=int, default=256, help="Gleichzeitige ping-Prozesse")
+    parser.add_argument("-W", "--timeout", type=float, default=1.0, help="Wartezeit pro Host in Sekunden")
+    parser.add_argument("-d", "--deadline", type=float, default=60.0, help="Maximale Gesamtdauer in Sekunden")
+    parser.add_argument("-a", "--all", action="store_true", help="Auch nicht erreichbare Hosts anzeigen")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    ip_input: str = input("Bitte geben Sie eine IP-Adresse mit Netzwerk-Suffix ein (z.B. 192.168.1.0/24): ")
-    ping_subnet(ip_input)
+    if sys.platform == "win32":
+        ip_input: str = input("Bitte geben Sie eine IP-Adresse mit Netzwerk-Suffix ein (z.B. 192.168.1.0/24): ")
+        ping_subnet(ip_input)
+        sys.exit(0)
+
+    args = parse_args()
+    t0 = perf_counter()
+    try:
+        results = sweep(args.network, args.method, args.concurrency, args.timeout, args.deadline)
+    except (ValueError, OSError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        sys.exit(1)
+    seconds = perf_counter() - t0
+
+    print(format_table(results, args.all))
+    total = ipaddress.ip_network(args.network, strict=False).num_addresses
+    up = sum(1 for rtt in results.values() if rtt is not None)
+    print(f"\n{up} erreichbar, {len(results) - up} nicht erreichbar, "
+          f"{max(0, total - 2 - len(results)) if total > 2 else 0} nicht geprüft ({seconds:.2f} s)")
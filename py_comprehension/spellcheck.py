@@ -2,7 +2,9 @@ __author__ = "Felix Friesenbichler"
 __email__ = "1127@htl.rennweg.at"
 __license__ = "GPLv2"
 
-from typing import Set, List, Tuple
+from typing import Dict, Iterable, Set, List, Tuple
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyzäöüß'
 
 
 def read_all_words(filename: str) -> Set[str]:
@@ -25,7 +27,7 @@ def split_word(wort: str) -> List[Tuple[str, str]]:
     :return: Eine Liste, welche Tupel enthält, bestehend aus head und tail
 
     >>> split_word("abc")
-    [ ("", "abc"), ("a", "bc"), ("ab", "c"), ("abc", "") ]
+    [('', 'abc'), ('a', 'bc'), ('ab', 'c'), ('abc', '')]
     """
     return [(wort[:i], wort[i:]) for i in range(len(wort) + 1)]
 
@@ -39,7 +41,7 @@ def edit1(wort: str) -> Set[str]:
     :return: Die Möglichkeiten, wie das Wort korrigiert werden könnte.
     """
 
-    letters = 'abcdefghijklmnopqrstuvwxyzäöüß'
+    letters = LETTERS
     splits = split_word(wort)
     deletes = {L + R[1:] for L, R in splits if R}
     transposes = {L + R[1] + R[0] + R[2:] for L, R in splits if len(R) > 1}
@@ -91,6 +93,121 @@ def correct(word: str, alle_woerter: List[str]) -> Set[str]:
     return edit1_good(word, alle_woerter) or edit2_good(word, alle_woerter)
 
 
+def deletes(wort: str, tiefe: int = 2) -> Set[str]:
+    """
+    Bestimmt alle Wörter, die durch Löschen von höchstens tiefe Zeichen
+    entstehen (inklusive des Wortes selbst).
+
+    :param wort: Das Ausgangswort.
+    :param tiefe: Die maximale Anzahl an gelöschten Zeichen.
+    :return: Alle Löschvarianten des Wortes.
+
+    >>> sorted(deletes("abc", 1))
+    ['ab', 'abc', 'ac', 'bc']
+    """
+    ergebnis = {wort}
+    ebene = {wort}
+    for _ in range(tiefe):
+        ebene = {L + R[1:] for w in ebene for L, R in split_word(w) if R}
+        ergebnis |= ebene
+    return ergebnis
+
+
+def build_delete_index(alle_woerter: Iterable[str], tiefe: int = 2) -> Dict[str, Set[str]]:
+    """
+    Baut einen Index, der jede Löschvariante (siehe deletes) auf die Wörter
+    des Wörterbuchs abbildet, aus denen sie entsteht. Zwei Wörter mit
+    höchstens zwei Tippfehlern Abstand haben immer eine gemeinsame
+    Löschvariante, daher liefert der Index alle Kandidaten für correct.
+
+    :param alle_woerter: Die Wörter des Wörterbuchs.
+    :param tiefe: Die maximale Anzahl an gelöschten Zeichen.
+    :return: Der Index von Löschvariante auf Wörter.
+
+    >>> index = build_delete_index({"abc", "abd"}, 1)
+    >>> sorted(index["ab"])
+    ['abc', 'abd']
+    """
+    index: Dict[str, Set[str]] = {}
+    for w in alle_woerter:
+        for d in deletes(w, tiefe):
+            index.setdefault(d, set()).add(w)
+    return index
+
+
+def is_edit1(wort: str, kandidat: str) -> bool:
+    """
+    Prüft, ob kandidat in edit1(wort) enthalten ist, ohne edit1 aufzurufen.
+
+    :param wort: Das Ausgangswort.
+    :param kandidat: Das zu prüfende Wort.
+    :return: True, wenn kandidat durch einen Tippfehler aus wort entsteht.
+
+    >>> is_edit1("abc", "acb"), is_edit1("abc", "abxc"), is_edit1("abc", "cab")
+    (True, True, False)
+    >>> all(is_edit1("haus", w) for w in edit1("haus"))
+    True
+    """
+    n, m = len(wort), len(kandidat)
+    if m == n - 1:
+        i = 0
+        while i < m and wort[i] == kandidat[i]:
+            i += 1
+        return wort[i + 1:] == kandidat[i:]
+    if m == n + 1:
+        i = 0
+        while i < n and wort[i] == kandidat[i]:
+            i += 1
+        return kandidat[i] in LETTERS and kandidat[i + 1:] == wort[i:]
+    if m != n:
+        return False
+    diff = [i for i in range(n) if wort[i] != kandidat[i]]
+    if not diff:
+        return (any(c in LETTERS for c in wort)
+                or any(wort[i] == wort[i + 1] for i in range(n - 1)))
+    if len(diff) == 1:
+        return kandidat[diff[0]] in LETTERS
+    if len(diff) == 2:
+        i, j = diff
+        return j == i + 1 and wort[i] == kandidat[j] and wort[j] == kandidat[i]
+    return False
+
+
+def correct_indexed(word: str, alle_woerter: Set[str], index: Dict[str, Set[str]]) -> Set[str]:
+    """
+    Liefert dieselben Korrekturen wie correct, sucht die Kandidaten aber
+    über einen mit build_delete_index erzeugten Index, statt alle Wörter mit
+    Edit-Distanz zwei zu erzeugen.
+
+    :param word: Das Wort, für welches Verbesserungsvorschläge angezeigt werden
+    sollen.
+    :param alle_woerter: Ein Set von Wörtern für die gecheckt werden soll.
+    :param index: Der Index aus build_delete_index(alle_woerter).
+    :return: Die Möglichkeiten, wie das Wort korrigiert werden könnte.
+
+    >>> woerter = {"haus", "maus", "hausen", "laus"}
+    >>> index = build_delete_index(woerter)
+    >>> correct_indexed("Hasu", woerter, index) == correct("Hasu", woerter)
+    True
+    >>> correct_indexed("hxasx", woerter, index) == correct("hxasx", woerter)
+    True
+    """
+    word = word.lower()
+    if word in alle_woerter:
+        return {word}
+    kandidaten = {w for d in deletes(word) for w in index.get(d, ())}
+    gefunden = {w for w in kandidaten if is_edit1(word, w)}
+    if gefunden or not kandidaten:
+        return gefunden
+    nach_laenge: Dict[int, List[str]] = {}
+    for e1 in edit1(word):
+        nach_laenge.setdefault(len(e1), []).append(e1)
+    return {w for w in kandidaten
+            if any(is_edit1(e1, w)
+                   for laenge in (len(w) - 1, len(w), len(w) + 1)
+                   for e1 in nach_laenge.get(laenge, ()))}
+
+
 if __name__ == "__main__":
 
     woerter = read_all_words("de-en.txt")
@@ -0,0 +1,201 @@
+__author__ = "Felix Friesenbichler"
+__email__ = "1127@htl.rennweg.at"
+__license__ = "GPLv2"
+
+import argparse
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Dict, List, Set, Tuple
+
+from spellcheck import (LETTERS, build_delete_index, correct, correct_indexed,
+                        edit1, edit1_good, edit2_good, read_all_words)
+
+
+def random_dictionary(anzahl: int, min_len: int = 3, max_len: int = 12,
+                      seed: int = 0) -> Set[str]:
+    """
+    Erzeugt ein synthetisches Wörterbuch aus zufälligen Wörtern.
+
+    :param anzahl: Die Anzahl der Wörter.
+    :param min_len: Die minimale Wortlänge.
+    :param max_len: Die maximale Wortlänge.
+    :param seed: Startwert für den Zufallsgenerator.
+    :return: Das Set mit den erzeugten Wörtern.
+
+    >>> len(random_dictionary(100, seed=1))
+    100
+    >>> random_dictionary(5, seed=1) == random_dictionary(5, seed=1)
+    True
+    """
+    rng = random.Random(seed)
+    woerter: Set[str] = set()
+    while len(woerter) < anzahl:
+        laenge = rng.randint(min_len, max_len)
+        woerter.add("".join(rng.choice(LETTERS) for _ in range(laenge)))
+    return woerter
+
+
+def misspell(wort: str, distanz: int, rng: random.Random) -> str:
+    """
+    Baut distanz zufällige Tippfehler (insert, delete, replace, transpose)
+    in das Wort ein.
+
+    :param wort: Das korrekte Wort.
+    :param distanz: Die Anzahl der Tippfehler.
+    :param rng: Der Zufallsgenerator.
+    :return: Das falsch geschriebene Wort.
+
+    >>> rng = random.Random(3)
+    >>> all(misspell("haus", 1, rng) in edit1("haus") for _ in range(50))
+    True
+    >>> all(len(misspell("a", 3, rng)) <= 4 for _ in range(200))
+    True
+    """
+    for _ in range(distanz):
+        ops = ["insert"]
+        if wort:
+            ops += ["delete", "replace"]
+        if len(wort) > 1:
+            ops.append("transpose")
+        op = rng.choice(ops)
+        i = rng.randrange(len(wort) + (op == "insert"))
+        if op == "insert":
+            wort = wort[:i] + rng.choice(LETTERS) + wort[i:]
+        elif op == "delete":
+            wort = wort[:i] + wort[i + 1:]
+        elif op == "replace":
+            i = min(i, len(wort) - 1)
+            wort = wort[:i] + rng.choice(LETTERS) + wort[i + 1:]
+        else:
+            i = min(i, len(wort) - 2)
+            wort = wort[:i] + wort[i + 1] + wort[i] + wort[i + 2:]
+    return wort
+
+
+def make_queries(woerter: Set[str], anzahl: int, seed: int = 0) -> List[str]:
+    """
+    Erzeugt Suchwörter mit je einem bzw. zwei Tippfehlern (abwechselnd).
+
+    :param woerter: Das Wörterbuch.
+    :param anzahl: Die Anzahl der Suchwörter.
+    :param seed: Startwert für den Zufallsgenerator.
+    :return: Die Liste der falsch geschriebenen Wörter.
+
+    >>> len(make_queries({"haus", "maus"}, 4))
+    4
+    """
+    rng = random.Random(seed)
+    basis = sorted(woerter)
+    return [misspell(rng.choice(basis), 1 + i % 2, rng) for i in range(anzahl)]
+
+
+def percentile(werte: List[float], p: float) -> float:
+    """
+    Bestimmt das p-Perzentil (nearest rank) einer Liste von Messwerten.
+
+    >>> percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 50)
+    5
+    >>> percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 99)
+    10
+    """
+    sortiert = sorted(werte)
+    rang = max(1, -(-len(sortiert) * p // 100))
+    return sortiert[int(rang) - 1]
+
+
+def measure(func: Callable[[str], object], queries: List[str]) -> Dict[str, float]:
+    """
+    Misst die Latenz (p50/p95/p99 in ms) jedes einzelnen Aufrufs und danach
+    in einem zweiten Durchlauf den Spitzenspeicherverbrauch (in KiB).
+    Die Speichermessung läuft getrennt, weil tracemalloc die Zeiten verfälscht.
+
+    :param func: Die zu messende Funktion, bekommt ein Suchwort.
+    :param queries: Die Suchwörter.
+    :return: Ein Dictionary mit den Kennzahlen.
+    """
+    zeiten = []
+    for q in queries:
+        t0 = perf_counter()
+        func(q)
+        zeiten.append((perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    peak = 0
+    for q in queries:
+        tracemalloc.reset_peak()
+        func(q)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {"p50": percentile(zeiten, 50), "p95": percentile(zeiten, 95),
+            "p99": percentile(zeiten, 99), "peak_kib": peak / 1024}
+
+
+def cross_check(strategies: Dict[str, Callable[[str], Set[str]]],
+                reference: Callable[[str], Set[str]],
+                queries: List[str]) -> List[Tuple[str, str]]:
+    """
+    Vergleicht die Ergebnisse aller Strategien mit der Referenz.
+
+    :param strategies: Name und Funktion der beschleunigten Strategien.
+    :param reference: Die Referenzimplementierung.
+    :param queries: Die Suchwörter.
+    :return: Liste der Abweichungen als (Strategie, Suchwort).
+
+    >>> woerter = random_dictionary(200, seed=2)
+    >>> index = build_delete_index(woerter)
+    >>> queries = make_queries(woerter, 40, seed=2)
+    >>> cross_check({"indexed": lambda w: correct_indexed(w, woerter, index)},
+    ...             lambda w: correct(w, woerter), queries)
+    []
+    """
+    fehler = []
+    for q in queries:
+        erwartet = reference(q)
+        for name, func in strategies.items():
+            if func(q) != erwartet:
+                fehler.append((name, q))
+    return fehler
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark für spellcheck.py")
+    parser.add_argument("-d", "--dictionary", help="Wörterbuchdatei (default: synthetisch)")
+    parser.add_argument("-w", "--words", type=int, default=20000, help="Anzahl synthetischer Wörter")
+    parser.add_argument("-n", "--queries", type=int, default=200, help="Anzahl der Suchwörter")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    woerter = read_all_words(args.dictionary) if args.dictionary else random_dictionary(args.words, seed=args.seed)
+    queries = make_queries(woerter, args.queries, seed=args.seed)
+
+    t0 = perf_counter()
+    index = build_delete_index(woerter)
+    print(f"Index: {len(index)} Einträge in {perf_counter() - t0:.2f} s")
+
+    reference = lambda w: correct(w, woerter)
+    accelerated = {"correct_indexed": lambda w: correct_indexed(w, woerter, index)}
+
+    fehler = cross_check(accelerated, reference, queries)
+    for name, q in fehler:
+        print(f"{name}: abweichendes Ergebnis für {q!r}", file=sys.stderr)
+
+    strategies = {
+        "edit1": edit1,
+        "edit1_good": lambda w: edit1_good(w, woerter),
+        "edit2_good": lambda w: edit2_good(w, woerter),
+        "correct": reference,
+        **accelerated,
+    }
+    print(f"{'Strategie':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KiB':>12}")
+    for name, func in strategies.items():
+        r = measure(func, queries)
+        print(f"{name:<16}{r['p50']:>10.3f}{r['p95']:>10.3f}{r['p99']:>10.3f}{r['peak_kib']:>12.1f}")
+
+    sys.exit(1 if fehler else 0)
@@ -0,0 +1,100 @@
+
+__author__      = "Felix Friesenbichler"
+__email__       = "1127@htl.rennweg.at"
+__license__     = "GPLv2"
+
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+TrampolineInfo = namedtuple("TrampolineInfo", ["hits", "misses", "maxsize", "currsize", "max_depth"])
+
+
+class _Call:
+    """A recursive call requested by a trampolined generator."""
+
+    __slots__ = ("args",)
+
+    def __init__(self, args):
+        self.args = args
+
+
+def trampoline(maxsize=1024):
+    """
+    Decorator which runs a recursive definition on an explicit stack instead
+    of the Python call stack, so deep recursion does not raise a
+    RecursionError, and memoizes the results in a bounded LRU cache, so
+    overlapping subcalls are computed only once.
+
+    The decorated function has to be written as a generator: a recursive
+    call is written as ``result = yield f.recurse(args)`` and the result
+    is returned with ``return``.
+
+    :param maxsize: Maximum number of memoized results (None: unbounded)
+    :return: The decorator
+
+    >>> @trampoline(maxsize=None)
+    ... def fib(n):
+    ...     if n < 2:
+    ...         return n
+    ...     a = yield fib.recurse(n - 1)
+    ...     b = yield fib.recurse(n - 2)
+    ...     return a + b
+    >>> fib(300)
+    222232244629420445529739893461909967206666939096499764990979600
+    >>> fib.cache_info()
+    TrampolineInfo(hits=298, misses=301, maxsize=None, currsize=301, max_depth=300)
+    """
+
+    def decorator(func):
+        cache = OrderedDict()
+        stats = {"hits": 0, "misses": 0, "max_depth": 0}
+
+        def lookup(args):
+            if args in cache:
+                cache.move_to_end(args)
+                stats["hits"] += 1
+                return True, cache[args]
+            stats["misses"] += 1
+            return False, None
+
+        def store(args, value):
+            cache[args] = value
+            if maxsize is not None and len(cache) > maxsize:
+                cache.popitem(last=False)
+
+        @wraps(func)
+        def wrapper(*args):
+            found, value = lookup(args)
+            if found:
+                return value
+            stack = [(args, func(*args))]
+            stats["max_depth"] = max(stats["max_depth"], 1)
+            value = None
+            while stack:
+                args, gen = stack[-1]
+                try:
+                    call = gen.send(value)
+                except StopIteration as stop:
+                    stack.pop()
+                    value = stop.value
+                    store(args, value)
+                    continue
+                found, value = lookup(call.args)
+                if not found:
+                    stack.append((call.args, func(*call.args)))
+                    stats["max_depth"] = max(stats["max_depth"], len(stack))
+            return value
+
+        def cache_info():
+            return TrampolineInfo(stats["hits"], stats["misses"], maxsize, len(cache), stats["max_depth"])
+
+        def cache_clear():
+            cache.clear()
+            stats.update(hits=0, misses=0, max_depth=0)
+
+        wrapper.recurse = lambda *args: _Call(args)
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator